@@ -0,0 +1,229 @@
+"""Local HTTP job API: ``python api.py`` (binds API_HOST:API_PORT, default 127.0.0.1:8000).
+
+POST /jobs                         submit documents, returns 202 with the job id
+GET  /jobs/<id>                    status, timing breakdown and summary once done
+GET  /jobs/<id>/artifacts/<name>   reviewed .docx files, summary.json, reviewed_docs.zip
+GET  /health                       queue depth and worker usage
+GET  /metrics                      Prometheus text exposition
+"""
+import base64
+import binascii
+import io
+import json
+import os
+import sys
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+if CURRENT_DIR not in sys.path:
+    sys.path.append(CURRENT_DIR)
+
+from src.config import AppConfig
+from src.services import get_registry
+from src.jobs import JobStore, JobWorkers, QueueFull
+from src.utils.metrics import METRICS
+
+CONTENT_TYPES = {
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".json": "application/json",
+    ".zip": "application/zip",
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+class TooLarge(BadRequest):
+    pass
+
+
+def parse_submission(content_type: str, body: bytes, max_bytes: int | None = None) -> Dict[str, bytes]:
+    """Documents from a JSON body (``{"files": [{"name", "content" (base64)}]}``) or a ZIP of .docx files.
+
+    A ZIP whose entries would inflate past ``max_bytes`` is rejected before any is read.
+    """
+    files: Dict[str, bytes] = {}
+    if content_type.startswith("application/zip"):
+        try:
+            with zipfile.ZipFile(io.BytesIO(body)) as z:
+                infos = [i for i in z.infolist() if not i.is_dir()]
+                if max_bytes is not None and sum(i.file_size for i in infos) > max_bytes:
+                    raise TooLarge(f"Uncompressed submission exceeds {max_bytes} bytes")
+                entries = [(i.filename, z.read(i)) for i in infos]
+        except zipfile.BadZipFile:
+            raise BadRequest("Body is not a valid ZIP archive")
+    elif content_type.startswith("application/json"):
+        try:
+            payload = json.loads(body or b"{}")
+            entries = [(f["name"], base64.b64decode(f["content"], validate=True)) for f in payload.get("files", [])]
+        except (ValueError, KeyError, TypeError, binascii.Error):
+            raise BadRequest('Expected {"files": [{"name": "...docx", "content": "<base64>"}]}')
+    else:
+        raise BadRequest("Content-Type must be application/json or application/zip")
+    for name, data in entries:
+        name = os.path.basename(name)
+        if not name.lower().endswith(".docx"):
+            raise BadRequest(f"Only .docx files are accepted: {name}")
+        if name in files:
+            raise BadRequest(f"Duplicate file name: {name}")
+        files[name] = data
+    if not files:
+        raise BadRequest("No documents submitted")
+    return files
+
+
+class JobAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: AppConfig, store: JobStore, workers: JobWorkers):
+        super().__init__(address, JobAPIHandler)
+        self.config = config
+        self.store = store
+        self.workers = workers
+
+
+class JobAPIHandler(BaseHTTPRequestHandler):
+    server: JobAPIServer
+
+    def _send_json(self, status: int, payload: Any, headers: Dict[str, str] | None = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, headers: Dict[str, str] | None = None) -> None:
+        self._send_json(status, {"error": message}, headers)
+
+    def _job_view(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        job = dict(job)
+        job["artifacts"] = {name: f"/jobs/{job['id']}/artifacts/{name}" for name in self.server.store.artifacts(job["id"])} if job["status"] == "done" else {}
+        return job
+
+    def do_GET(self) -> None:
+        parts = [p for p in self.path.split("?", 1)[0].split("/") if p]
+        store = self.server.store
+        if parts == ["health"]:
+            self._send_json(200, {
+                "status": "ok",
+                "ready": get_registry().ready.is_set(),
+                "queue_depth": store.queue_depth(),
+                "queue_limit": store.queue_limit,
+                "workers": self.server.workers.workers,
+                "busy_workers": self.server.workers.busy,
+                "jobs": store.counts(),
+            })
+            return
+        if parts == ["metrics"]:
+            METRICS.set("adgm_job_queue_depth", store.queue_depth(), "Jobs waiting to run.")
+            METRICS.set("adgm_job_workers_busy", self.server.workers.busy, "Job workers currently running a job.")
+            body = METRICS.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if len(parts) >= 2 and parts[0] == "jobs":
+            job = store.get(parts[1])
+            if job is None:
+                self._error(404, "Unknown job")
+                return
+            if len(parts) == 2:
+                self._send_json(200, self._job_view(job))
+                return
+            if len(parts) == 4 and parts[2] == "artifacts":
+                if parts[3] not in store.artifacts(job["id"]):
+                    self._error(404, "Unknown artifact")
+                    return
+                path = os.path.join(store.job_dir(job["id"], "output"), parts[3])
+                with open(path, "rb") as f:
+                    data = f.read()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream"))
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Content-Disposition", f'attachment; filename="{parts[3]}"')
+                self.end_headers()
+                self.wfile.write(data)
+                return
+        self._error(404, "Not found")
+
+    def do_POST(self) -> None:
+        if self.path.split("?", 1)[0].rstrip("/") != "/jobs":
+            self._error(404, "Not found")
+            return
+        store = self.server.store
+        # Admission control before reading the body: size cap and queue-depth limit
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._error(400, "Invalid Content-Length")
+            return
+        if length > self.server.config.job_max_upload_bytes:
+            self._error(413, f"Submission exceeds {self.server.config.job_max_upload_bytes} bytes")
+            self.close_connection = True
+            return
+        if store.queue_depth() >= store.queue_limit:
+            self.close_connection = True
+            self._error(429, "Job queue is full", {"Retry-After": "30"})
+            return
+        body = self.rfile.read(length)
+        try:
+            files = parse_submission(self.headers.get("Content-Type", ""), body, self.server.config.job_max_upload_bytes)
+            job_id = store.submit(files)
+        except TooLarge as e:
+            self._error(413, str(e))
+            return
+        except BadRequest as e:
+            self._error(400, str(e))
+            return
+        except QueueFull:
+            self._error(429, "Job queue is full", {"Retry-After": "30"})
+            return
+        self._send_json(202, {"id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}", "queue_depth": store.queue_depth()})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        sys.stderr.write(f"[api] {self.address_string()} {format % args}\n")
+
+
+def create_server(config: AppConfig | None = None) -> JobAPIServer:
+    registry = get_registry()
+    if config is not None:
+        registry.reload(config)
+    config = registry.config
+    load_times = registry.warm_up()
+    print("Services loaded: " + ", ".join(f"{k}={v:.2f}s" for k, v in load_times.items()), file=sys.stderr)
+    print(registry.indexer().build_or_rebuild(), file=sys.stderr)
+    store = JobStore(config.jobs_dir, queue_limit=config.job_queue_limit)
+    workers = JobWorkers(store, registry.as_dict, config.job_workers)
+    workers.start()
+    return JobAPIServer((config.api_host, config.api_port), config, store, workers)
+
+
+def main():
+    load_dotenv()  # load .env if present
+    server = create_server()
+    host, port = server.server_address[:2]
+    print(f"Job API listening on http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.workers.stop(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 import os
 import json
 import shutil
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
 from typing import List, Dict, Any
 
-import gradio as gr
-
 from dotenv import load_dotenv
 
 # Ensure src package on sys.path
@@ -17,150 +19,133 @@ if SRC_DIR not in sys.path:
     sys.path.append(SRC_DIR)
 
 from src.config import AppConfig
+from src.services import get_registry
 from src.utils.file_utils import (
-    ensure_directories,
-    save_json_pretty,
-    zip_files,
+    StreamingZipWriter,
+    save_json,
 )
+from src.utils.metrics import METRICS, Span, bind_context, span
 from src.utils.time_utils import now_timestamp_ist
-from src.docx_tools.parser import read_docx_text
-from src.docx_tools.annotator import annotate_docx_with_issues
-from src.rules.checks import (
-    REQUIRED_INCORP_DOCS,
-    classify_document_type,
-    detect_red_flags_rule_based,
-    detect_process_by_content,
-)
-from src.rag.indexer import RAGIndexer
-from src.rag.retriever import RAGRetriever
-from src.llm.client import LLMClient
+from src.pipeline import STAGE_LABELS, DocumentReview, build_summary, output_paths, review_document
 
 
 def build_services() -> Dict[str, Any]:
-    config = AppConfig.from_env()
-    ensure_directories([
-        config.data_reference_dir,
-        config.outputs_dir,
-        config.vectorstore_dir,
-    ])
-    indexer = RAGIndexer(config=config)
-    retriever = RAGRetriever(config=config)
-    llm = LLMClient(config=config)
-    return {
-        "config": config,
-        "indexer": indexer,
-        "retriever": retriever,
-        "llm": llm,
-    }
+    # Services live in the process-wide registry; only the first call pays for loading them
+    return get_registry().as_dict()
 
 
 def maybe_build_index(services: Dict[str, Any], force_rebuild: bool = False) -> str:
-    indexer: RAGIndexer = services["indexer"]
+    indexer = services["indexer"]
     status = indexer.build_or_rebuild(force_rebuild=force_rebuild)
     return status
 
 
-def analyze_documents(files: List[gr.File], rebuild_index: bool = False):
-    services = build_services()
-    config: AppConfig = services["config"]
-    retriever: RAGRetriever = services["retriever"]
-    llm: LLMClient = services["llm"]
+def _progress_markdown(index_status: str, stages: Dict[str, str]) -> str:
+    lines = [f"**Index:** {index_status}"]
+    for name, stage in stages.items():
+        lines.append(f"- `{name}`: {STAGE_LABELS.get(stage, stage)}")
+    return "\n".join(lines)
 
-    status_msg = maybe_build_index(services, force_rebuild=rebuild_index)
 
+def analyze_documents(files: List[Any], rebuild_index: bool = False):
+    """Generator handler: yields the growing summary after every finished document.
+
+    Documents are reviewed concurrently; closing the generator (the Stop
+    button) stops queued documents and the running ones at their next stage.
+    The final summary carries a ``timing`` span tree for the whole request.
+    """
     uploaded_paths = [f.name if hasattr(f, 'name') else f for f in (files or [])]
-    document_analysis: List[Dict[str, Any]] = []
-    reviewed_paths: List[str] = []
-
-    # Collect which required docs were present
-    present_required_docs: set = set()
-
-    for idx, path in enumerate(uploaded_paths):
-        if not path or not os.path.exists(path):
-            continue
-
-        text = read_docx_text(path)
-        doc_type = classify_document_type(text, filename=os.path.basename(path))
-        if doc_type in REQUIRED_INCORP_DOCS:
-            present_required_docs.add(doc_type)
-
-        # Retrieve context for LLM/RAG
-        contexts = retriever.retrieve(query=f"ADGM rules related to {doc_type}", top_k=5)
-
-        # Rule-based findings
-        issues_rule_based = detect_red_flags_rule_based(text, doc_type)
-
-        # LLM-assisted findings (optional)
-        issues_llm: List[Dict[str, Any]] = []
-        if llm.is_enabled:
-            issues_llm = llm.analyze_document(text=text, doc_type=doc_type, contexts=contexts)
-
-        # Merge and add source citations (from retriever contexts)
-        merged_issues: List[Dict[str, Any]] = []
-        for issue in issues_rule_based + issues_llm:
-            issue = dict(issue)
-            # attach top source snippets for transparency
-            issue["source_citations"] = contexts
-            issue.setdefault("document", doc_type)
-            merged_issues.append(issue)
-
-        # Annotate and save reviewed docx
-        base_name, ext = os.path.splitext(os.path.basename(path))
-        reviewed_name = f"{base_name}_reviewed{ext}"
-        reviewed_path = os.path.join(config.outputs_dir, reviewed_name)
-        annotate_docx_with_issues(input_path=path, issues=merged_issues, output_path=reviewed_path)
-        reviewed_paths.append(reviewed_path)
-
-        document_analysis.append({
-            "file_name": os.path.basename(path),
-            "document_type": doc_type,
-            "issues_found": merged_issues,
-        })
-
-    # Determine process by content (POC: default to Company Incorporation if any known doc)
-    process = detect_process_by_content(document_analysis)
-
-    # Checklist verification
-    required_set = set(REQUIRED_INCORP_DOCS)
-    missing = sorted(list(required_set - present_required_docs))
-
-    summary = {
-        "timestamp": now_timestamp_ist(),
-        "process": process,
-        "documents_uploaded": len(uploaded_paths),
-        "required_documents": len(required_set),
-        "missing_documents": missing,
-        "document_analysis": document_analysis,
-    }
+    paths = [p for p in uploaded_paths if p and os.path.exists(p)]
+    stages: Dict[str, str] = {os.path.basename(p): "queued" for p in paths}
+    # The generator resumes on arbitrary threads, so the root span is passed explicitly
+    root = Span("analyze", documents=len(paths))
+    if not get_registry().ready.is_set():
+        # Still warming up in the background; build_services waits for it
+        yield None, [], None, None, "", _progress_markdown("loading models...", stages)
+    with span("services", parent=root):
+        services = build_services()
+    config: AppConfig = services["config"]
 
-    # Save consolidated JSON
-    json_name = f"summary_{summary['timestamp'].replace(':', '-')}.json"
-    json_path = os.path.join(config.outputs_dir, json_name)
-    save_json_pretty(summary, json_path)
+    yield None, [], None, None, "", _progress_markdown("checking...", stages)
+    with span("index", parent=root):
+        status_msg = maybe_build_index(services, force_rebuild=rebuild_index)
+
+    timestamp = now_timestamp_ist()
+    out = output_paths(config, timestamp)
+    compact = config.summary_schema == "compact"
+    # Reviewed files go into the ZIP as each one is written; no zipping pass at the end
+    archive = StreamingZipWriter(out["zip"])
+    results: Dict[int, DocumentReview] = {}
+    cancel = threading.Event()
+    # Threads drive each document; with WORKERS > 1 they hand CPU-bound steps to the process pool
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max(config.llm_concurrency, config.workers), len(paths))))
+    try:
+        futures = {
+            pool.submit(
+                bind_context(review_document, parent=root), services, path,
+                cancel=cancel,
+                on_stage=partial(stages.__setitem__, os.path.basename(path)),
+                archive=archive,
+            ): i
+            for i, path in enumerate(paths)
+        }
+        pending = set(futures)
+        last_progress = None
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for fut in done:
+                results[futures[fut]] = fut.result()
+            progress = _progress_markdown(status_msg, stages)
+            if not done and progress == last_progress:
+                continue
+            last_progress = progress
+            reviews = [results[i] for i in sorted(results)]
+            summary = build_summary(reviews, len(uploaded_paths), timestamp=timestamp, compact=compact)
+            notes = f"Reviewed {len(reviews)} of {len(paths)} document(s)..."
+            yield summary, [r.reviewed_path for r in reviews], None, None, notes, progress
+    finally:
+        cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        archive.close()
+
+    reviews = [results[i] for i in sorted(results)]
+    reviewed_paths = [r.reviewed_path for r in reviews]
+    summary = build_summary(reviews, len(uploaded_paths), timestamp=timestamp, compact=compact)
+
+    root.end = time.perf_counter()
+    summary["timing"] = root.to_dict()
+    METRICS.observe("adgm_stage_seconds", root.duration, stage=root.name)
 
-    # Also provide a zip of reviewed docs for convenience
-    zip_path = os.path.join(config.outputs_dir, f"reviewed_docs_{summary['timestamp'].replace(':', '-')}.zip")
-    if reviewed_paths:
-        zip_files(reviewed_paths, zip_path)
+    # Save consolidated JSON
+    json_path = out["json"]
+    save_json(summary, json_path, indent=config.summary_indent)
+    zip_path = out["zip"] if archive.written else None
+    if config.metrics_file:
+        METRICS.write_prometheus(config.metrics_file)
 
     human_message = (
         f"Index: {status_msg}\n"
-        f"Detected process: {process}\n"
+        f"Detected process: {summary['process']}\n"
         f"You uploaded {len(uploaded_paths)} document(s). "
-        f"Required: {len(required_set)}. Missing: {len(missing)}."
+        f"Required: {summary['required_documents']}. Missing: {len(summary['missing_documents'])}."
     )
 
-    return summary, reviewed_paths, json_path, zip_path, human_message
+    yield summary, reviewed_paths, json_path, zip_path, human_message, _progress_markdown(status_msg, stages)
 
 
 def build_ui():
+    import gradio as gr
+
     with gr.Blocks(title="ADGM Corporate Agent") as demo:
         gr.Markdown("**ADGM Corporate Agent** — Upload `.docx` files for review (RAG + rules).")
         with gr.Row():
             files = gr.Files(label="Upload .docx files", file_types=[".docx"], file_count="multiple")
         with gr.Row():
             rebuild = gr.Checkbox(label="Rebuild Index (RAG)", value=False)
-        analyze_btn = gr.Button("Analyze")
+        with gr.Row():
+            analyze_btn = gr.Button("Analyze")
+            stop_btn = gr.Button("Stop")
+        progress = gr.Markdown()
 
         with gr.Accordion("Results", open=True):
             resumen = gr.JSON(label="Consolidated Summary JSON (preview)")
@@ -169,18 +154,38 @@ def build_ui():
             reviewed_zip = gr.File(label="Download ZIP of Reviewed DOCX")
             notes = gr.Markdown()
 
-        analyze_btn.click(
+        analyze_event = analyze_btn.click(
             fn=analyze_documents,
             inputs=[files, rebuild],
-            outputs=[resumen, reviewed_files, summary_json, reviewed_zip, notes],
+            outputs=[resumen, reviewed_files, summary_json, reviewed_zip, notes, progress],
         )
+        stop_btn.click(fn=None, inputs=None, outputs=None, cancels=[analyze_event])
 
     return demo
 
 
+def _report_ready(registry, started: float) -> None:
+    registry.ready.wait()
+    if registry.warm_error:
+        print(f"Warm-up failed: {registry.warm_error}")
+        return
+    print(
+        f"Ready after {time.perf_counter() - started:.2f}s. Services loaded: "
+        + ", ".join(f"{k}={v:.2f}s" for k, v in registry.load_times.items())
+        + f". Index: {registry.index_status}"
+    )
+
+
 def main():
+    started = time.perf_counter()
     load_dotenv()  # load .env if present
+    registry = get_registry()
+    # Models and the reference index load in the background while the UI comes up
+    registry.warm_up_async()
+    threading.Thread(target=_report_ready, args=(registry, started), daemon=True).start()
     demo = build_ui()
+    demo.queue()  # generator handlers and cancellation need the queue
+    print(f"UI built in {time.perf_counter() - started:.2f}s; loading models in the background")
     demo.launch()
 
 
@@ -0,0 +1,48 @@
+"""Compare two benchmark results: ``python benchmarks/compare.py BASELINE.json CANDIDATE.json``.
+
+Prints the p50/p95 change of every stage present in both files and exits
+with status 1 when any stage's p50 got slower by more than ``--threshold``.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    rows = []
+    for name, base in baseline.get("stages", {}).items():
+        cand = candidate.get("stages", {}).get(name)
+        if cand is None:
+            continue
+        row: Dict[str, Any] = {"stage": name}
+        for key in ("p50_ms", "p95_ms"):
+            row[key] = (base[key], cand[key], cand[key] / base[key] - 1 if base[key] else 0.0)
+        row["regressed"] = row["p50_ms"][2] > threshold
+        rows.append(row)
+    return rows
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed p50 slowdown as a fraction (default 0.10)")
+    args = parser.parse_args(argv)
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(f"baseline {baseline['meta'].get('revision')}  candidate {candidate['meta'].get('revision')}")
+    rows = compare(baseline, candidate, args.threshold)
+    for row in rows:
+        cells = "  ".join(f"{key[:3]} {old:10.2f} -> {new:10.2f} ms ({change:+6.1%})" for key, (old, new, change) in ((k, row[k]) for k in ("p50_ms", "p95_ms")))
+        print(f"{row['stage']:24} {cells}{'  REGRESSION' if row['regressed'] else ''}")
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Compare embedding backends for speed and accuracy: ``python benchmarks/embeddings.py``.
+
+Embeds synthetic reference chunks and queries with every backend in
+``--backends``. Speed is reported as load time and chunks per second.
+Accuracy is measured against the first backend (the reference, ``torch`` by
+default): the cosine similarity between the two backends' vectors for each
+text, and how many of the reference top-k chunks each query still retrieves
+(recall@k). Results are written as JSON.
+"""
+import argparse
+import dataclasses
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from benchmarks.run import git_revision
+from benchmarks.synthetic import CLAUSES, REFERENCE_TOPICS
+from src.config import AppConfig
+from src.rag.embeddings import EMBEDDINGS_BACKENDS, EmbeddingsModel
+from src.rules.checks import REQUIRED_INCORP_DOCS
+from src.utils.file_utils import save_json
+
+
+def make_texts(chunks: int, seed: int) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(chunks):
+        title, rule = REFERENCE_TOPICS[i % len(REFERENCE_TOPICS)]
+        corpus.append(f"{title}. {rule} " + " ".join(rng.sample(CLAUSES, k=rng.randint(3, 8))))
+    queries = [f"ADGM rules related to {t}" for t in REQUIRED_INCORP_DOCS] + [rule for _, rule in REFERENCE_TOPICS]
+    return {"corpus": corpus, "queries": queries}
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = normalize(queries) @ normalize(corpus).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def bench_backend(config: AppConfig, texts: Dict[str, List[str]], repeat: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    model = EmbeddingsModel(config)
+    load_seconds = time.perf_counter() - start
+    model.embed(texts["corpus"][: model.batch_size])  # warm-up batch
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        corpus = model.embed(texts["corpus"])
+        runs.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    queries = model.embed(texts["queries"])
+    query_seconds = time.perf_counter() - start
+    best = min(runs)
+    return {
+        "stats": {
+            "load_s": round(load_seconds, 3),
+            "corpus_s_best": round(best, 4),
+            "chunks_per_s": round(len(texts["corpus"]) / best, 2),
+            "query_ms_each": round(query_seconds / len(texts["queries"]) * 1000, 3),
+            "dim": model.dim,
+            "dtype": str(corpus.dtype),
+            "c_contiguous": bool(corpus.flags["C_CONTIGUOUS"]),
+        },
+        "corpus": corpus,
+        "queries": queries,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare EmbeddingsModel backends for speed and accuracy.")
+    parser.add_argument("--backends", default=",".join(EMBEDDINGS_BACKENDS), help="Comma-separated; the first is the accuracy reference")
+    parser.add_argument("--chunks", type=int, default=512, help="Synthetic reference chunks to embed (default 512)")
+    parser.add_argument("--batch-sizes", default=None, help="Comma-separated EMBEDDINGS_BATCH_SIZE values to sweep (default: configured)")
+    parser.add_argument("--threads", type=int, default=None, help="Override EMBEDDINGS_THREADS")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Results JSON (default: outputs/benchmarks/embeddings_<time>.json)")
+    args = parser.parse_args(argv)
+    load_dotenv()  # load .env if present
+
+    base = AppConfig.from_env()
+    if args.threads is not None:
+        base = dataclasses.replace(base, embeddings_threads=args.threads)
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")] if args.batch_sizes else [base.embeddings_batch_size]
+    texts = make_texts(args.chunks, args.seed)
+
+    results: Dict[str, Any] = {}
+    reference: Dict[str, Any] | None = None
+    for backend in backends:
+        for batch_size in batch_sizes:
+            label = f"{backend}@{batch_size}"
+            print(f"{label}...", file=sys.stderr)
+            config = dataclasses.replace(base, embeddings_backend=backend, embeddings_batch_size=batch_size)
+            try:
+                run = bench_backend(config, texts, args.repeat)
+            except Exception as e:
+                results[label] = {"error": f"{type(e).__name__}: {e}"[:300]}
+                continue
+            stats = run["stats"]
+            if reference is None:
+                reference = run
+                reference_top = top_k(run["corpus"], run["queries"], args.top_k)
+            else:
+                cosine = np.sum(normalize(run["corpus"]) * normalize(reference["corpus"]), axis=1)
+                found = top_k(run["corpus"], run["queries"], args.top_k)
+                recall = np.mean([len(set(a) & set(b)) / args.top_k for a, b in zip(found, reference_top)])
+                stats["vs_reference"] = {
+                    "cosine_mean": round(float(cosine.mean()), 5),
+                    "cosine_min": round(float(cosine.min()), 5),
+                    f"recall_at_{args.top_k}": round(float(recall), 4),
+                    "speedup": round(stats["chunks_per_s"] / reference["stats"]["chunks_per_s"], 2),
+                }
+            results[label] = stats
+
+    report = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "revision": git_revision(), "cpu_count": os.cpu_count()},
+        "params": {**vars(args), "model": base.embeddings_model, "threads": base.embeddings_threads},
+        "backends": results,
+    }
+    output = args.output or os.path.join(PROJECT_ROOT, "outputs", "benchmarks", f"embeddings_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    save_json(report, output)
+    for label, stats in results.items():
+        if "error" in stats:
+            print(f"{label:20} failed: {stats['error']}")
+            continue
+        vs = stats.get("vs_reference")
+        accuracy = f"  cos {vs['cosine_mean']:.4f} (min {vs['cosine_min']:.4f})  recall@{args.top_k} {vs[f'recall_at_{args.top_k}']:.3f}  x{vs['speedup']}" if vs else "  (reference)"
+        print(f"{label:20} {stats['chunks_per_s']:9.1f} chunks/s  load {stats['load_s']:6.2f}s{accuracy}")
+    print(f"Results: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
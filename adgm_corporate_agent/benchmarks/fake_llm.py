@@ -0,0 +1,85 @@
+"""OpenAI-compatible chat completions endpoint with a fixed latency, for benchmarks.
+
+Point ``OPENAI_BASE_URL`` at ``server.base_url``; every request sleeps
+``latency`` seconds and answers with one issue quoting the document.
+"""
+from __future__ import annotations
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.5, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), FakeLLMHandler)
+        self.latency = latency
+        self.calls = 0
+        self.peak_concurrency = 0
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        threading.Thread(target=self.serve_forever, name="fake-llm", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    server: FakeLLMServer
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        server = self.server
+        with server._lock:
+            server.calls += 1
+            server._active += 1
+            server.peak_concurrency = max(server.peak_concurrency, server._active)
+        try:
+            time.sleep(server.latency)
+            prompt = body.get("messages", [{}])[-1].get("content", "")
+            payload = json.dumps(self._completion(body.get("model", "fake"), prompt)).encode("utf-8")
+        finally:
+            with server._lock:
+                server._active -= 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    @staticmethod
+    def _completion(model: str, prompt: str) -> dict:
+        # Quote a real sentence so the annotator has something to locate
+        sentences = re.findall(r"[A-Z][^.\n]{20,160}\.", prompt.split("Document content", 1)[-1])
+        issue = {
+            "section": None,
+            "issue": "Clause may not align with ADGM requirements.",
+            "suggestion": "Review against the cited ADGM regulation.",
+            "severity": "Low",
+            "snippet": sentences[len(sentences) // 2] if sentences else None,
+        }
+        content = json.dumps([issue])
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4, "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
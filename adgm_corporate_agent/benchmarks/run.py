@@ -0,0 +1,306 @@
+"""Benchmark the review pipeline on a synthetic corpus: ``python benchmarks/run.py [--documents 20]``.
+
+Generates the uploaded documents and a reference tree in a temporary
+directory, starts a local fake LLM with a fixed latency, then times each
+stage on its own (index build, retrieval, parsing, rule checks, annotation)
+and ``analyze_documents`` end to end. Results are written as JSON for
+``benchmarks/compare.py``. The environment's .env settings apply except for
+paths and the LLM, which always point at the temporary tree and the fake
+endpoint.
+"""
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from dotenv import load_dotenv
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.synthetic import REFERENCE_TOPICS, generate_corpus, generate_reference_tree
+from src.config import AppConfig
+from src.docx_tools.annotator import annotate_document
+from src.docx_tools.parser import parse_docx
+from src.rules.checks import REQUIRED_INCORP_DOCS, classify_document_type, detect_red_flags_rule_based
+from src.services import get_registry
+from src.utils.file_utils import save_json
+
+STAGES = ("startup", "index", "retrieve", "parse", "rules", "annotate", "end_to_end")
+
+HEAVY_MODULES = ("gradio", "torch", "sentence_transformers", "chromadb", "openai", "google.generativeai", "docx")
+
+# Run in a fresh interpreter: time ``import app`` and list the heavy modules it pulled in
+STARTUP_SNIPPET = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import app\n"
+    "elapsed = time.perf_counter() - start\n"
+    f"print(json.dumps({{'seconds': elapsed, 'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+)
+
+
+def summarize(samples: List[float], items: int | None = None) -> Dict[str, Any]:
+    """Latency statistics in milliseconds; ``items`` processed per second when given."""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    out: Dict[str, Any] = {
+        "n": len(ordered),
+        "total_s": round(total, 4),
+        "mean_ms": round(total / len(ordered) * 1000, 3),
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+    if items is not None and total > 0:
+        out["items_per_s"] = round(items / total, 3)
+    return out
+
+
+def timed(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench_config(work_dir: str, args: argparse.Namespace, llm_url: str) -> AppConfig:
+    base = AppConfig.from_env()
+    return dataclasses.replace(
+        base,
+        project_root=work_dir,
+        data_reference_dir=os.path.join(work_dir, "reference"),
+        outputs_dir=os.path.join(work_dir, "outputs"),
+        vectorstore_dir=os.path.join(work_dir, "vectorstore"),
+        cache_dir=os.path.join(work_dir, "cache"),
+        jobs_dir=os.path.join(work_dir, "jobs"),
+        llm_provider="openai",
+        openai_api_key="benchmark",
+        openai_base_url=llm_url,
+        llm_cache_enabled=False,
+        review_cache_enabled=False,
+        llm_requests_per_minute=0,
+        metrics_file="",
+        profile_slow_seconds=0,
+        retrieval_mode=args.retrieval_mode or base.retrieval_mode,
+        vector_backend=args.vector_backend or base.vector_backend,
+        workers=args.workers if args.workers is not None else base.workers,
+    )
+
+
+def git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def bench_startup(repeat: int) -> Dict[str, Any]:
+    samples = []
+    heavy: List[str] = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+        report = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(report["seconds"])
+        heavy = report["heavy"]
+    result = summarize(samples)
+    result["heavy_modules_imported"] = heavy
+    return {"startup_import_app": result}
+
+
+def bench_index(services: Dict[str, Any], repeat: int, reference_files: int) -> Dict[str, Any]:
+    indexer = services["indexer"]
+    build = [timed(lambda: indexer.build_or_rebuild(force_rebuild=True)) for _ in range(repeat)]
+    sync = [timed(indexer.build_or_rebuild) for _ in range(repeat)]
+    return {
+        "index_build": summarize(build, reference_files * repeat),
+        "index_sync_unchanged": summarize(sync),
+    }
+
+
+def bench_retrieve(services: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    retriever = services["retriever"]
+    queries = [f"ADGM rules related to {t}" for t in REQUIRED_INCORP_DOCS] + [topic for topic, _ in REFERENCE_TOPICS]
+    # Distinct strings per round defeat the result cache; the last round repeats them warm
+    cold = [timed(lambda q=q: retriever.retrieve(f"{q} ({r})", top_k=5)) for r in range(repeat) for q in queries]
+    warm = [timed(lambda q=q: retriever.retrieve(f"{q} ({repeat - 1})", top_k=5)) for q in queries]
+    batch = [timed(lambda r=r: retriever.retrieve_many([f"{q} [{r}]" for q in queries], top_k=5)) for r in range(repeat)]
+    return {
+        "retrieve_cold": summarize(cold, len(cold)),
+        "retrieve_cached": summarize(warm, len(warm)),
+        "retrieve_many_cold": summarize(batch, len(queries) * repeat),
+    }
+
+
+def bench_documents(paths: List[str], stages: List[str], repeat: int, out_dir: str) -> Dict[str, Any]:
+    os.makedirs(out_dir, exist_ok=True)
+    parse: List[float] = []
+    rules: List[float] = []
+    annotate: List[float] = []
+    for _ in range(repeat):
+        for path in paths:
+            if "parse" in stages:
+                parse.append(timed(lambda: parse_docx(path)))
+            model = parse_docx(path)
+            state: Dict[str, Any] = {}
+
+            def check() -> None:
+                state["doc_type"] = classify_document_type(model, filename=os.path.basename(path))
+                state["issues"] = detect_red_flags_rule_based(model, state["doc_type"])
+            rules.append(timed(check))
+            if "annotate" in stages:
+                # Rule findings plus LLM-style findings quoting every tenth paragraph
+                texts = [t for t in model.paragraph_texts if len(t) > 40]
+                issues = state["issues"] + [
+                    {"issue": "Synthetic finding", "suggestion": "None", "severity": "Low", "snippet": t[:120]}
+                    for t in texts[::10]
+                ]
+                out_path = os.path.join(out_dir, os.path.basename(path))
+                annotate.append(timed(lambda: annotate_document(model, issues, out_path)))
+    results: Dict[str, Any] = {}
+    if parse:
+        results["parse"] = summarize(parse, len(parse))
+    if "rules" in stages:
+        results["rules"] = summarize(rules, len(rules))
+    if annotate:
+        results["annotate"] = summarize(annotate, len(annotate))
+    return results
+
+
+def bench_end_to_end(paths: List[str], repeat: int, llm: FakeLLMServer) -> Dict[str, Any]:
+    import app
+
+    calls_before = llm.calls
+    runs = []
+    for _ in range(repeat):
+        def analyze() -> None:
+            for _ in app.analyze_documents(paths):
+                pass
+        runs.append(timed(analyze))
+    result = summarize(runs, len(paths) * repeat)
+    result["llm_calls"] = llm.calls - calls_before
+    result["llm_peak_concurrency"] = llm.peak_concurrency
+    return {"analyze_documents": result}
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the ADGM review pipeline on synthetic documents.")
+    parser.add_argument("--documents", type=int, default=16, help="Uploaded documents to generate (default 16)")
+    parser.add_argument("--paragraphs", type=int, default=80, help="Body paragraphs per document (default 80)")
+    parser.add_argument("--tables", type=int, default=2, help="Tables per document (default 2)")
+    parser.add_argument("--placeholder-rate", type=float, default=0.1, help="Share of paragraphs carrying a red flag (default 0.1)")
+    parser.add_argument("--reference-files", type=int, default=24, help="Reference files to index (default 24)")
+    parser.add_argument("--reference-paragraphs", type=int, default=80, help="Paragraphs per reference file (default 80)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds the fake LLM waits per call (default 0.5)")
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds per stage (default 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--retrieval-mode", default=None, help="Override RETRIEVAL_MODE")
+    parser.add_argument("--vector-backend", default=None, help="Override VECTOR_BACKEND")
+    parser.add_argument("--workers", type=int, default=None, help="Override WORKERS")
+    parser.add_argument("--output", default=None, help="Results JSON (default: outputs/benchmarks/bench_<time>.json)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated working directory")
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    work_dir = tempfile.mkdtemp(prefix="adgm-bench-")
+    llm = FakeLLMServer(latency=args.llm_latency).start()
+    config = bench_config(work_dir, args, llm.base_url)
+    registry = get_registry()
+    try:
+        generate_start = time.perf_counter()
+        paths = generate_corpus(
+            os.path.join(work_dir, "uploads"), args.documents, args.paragraphs, args.tables, args.placeholder_rate, args.seed,
+        )
+        generate_reference_tree(config.data_reference_dir, args.reference_files, args.reference_paragraphs, args.seed)
+        generate_seconds = time.perf_counter() - generate_start
+
+        results: Dict[str, Any] = {}
+        if "startup" in stages:
+            print("startup...", file=sys.stderr)
+            results.update(bench_startup(args.repeat))
+        registry.reload(config)
+        warm_start = time.perf_counter()
+        registry.warm_up()
+        ready_seconds = time.perf_counter() - warm_start
+        load_times = dict(registry.load_times)
+        services = registry.as_dict()
+        if "index" in stages:
+            print("index...", file=sys.stderr)
+            results.update(bench_index(services, args.repeat, args.reference_files))
+        else:
+            services["indexer"].build_or_rebuild()
+        if "retrieve" in stages:
+            print("retrieve...", file=sys.stderr)
+            results.update(bench_retrieve(services, args.repeat))
+        if {"parse", "rules", "annotate"} & set(stages):
+            print("parse / rules / annotate...", file=sys.stderr)
+            results.update(bench_documents(paths, stages, args.repeat, os.path.join(work_dir, "annotated")))
+        if "end_to_end" in stages:
+            print("end to end...", file=sys.stderr)
+            results.update(bench_end_to_end(paths, args.repeat, llm))
+    finally:
+        registry.reload()
+        llm.stop()
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "work_dir": work_dir if args.keep else None,
+        },
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "keep")},
+        "config": {
+            "retrieval_mode": config.retrieval_mode,
+            "vector_backend": config.vector_backend,
+            "embeddings_provider": config.embeddings_provider,
+            "embeddings_model": config.embeddings_model,
+            "llm_review_mode": config.llm_review_mode,
+            "llm_window_tokens": config.llm_window_tokens,
+            "llm_concurrency": config.llm_concurrency,
+            "workers": config.workers,
+        },
+        "corpus_generation_s": round(generate_seconds, 3),
+        "service_load_s": load_times,
+        "time_to_ready_s": round(ready_seconds, 3),
+        "stages": results,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    load_dotenv()  # load .env if present
+    args = parse_args(argv)
+    report = run(args)
+    output = args.output or os.path.join(PROJECT_ROOT, "outputs", "benchmarks", f"bench_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    save_json(report, output)
+    for name, stats in report["stages"].items():
+        rate = f"  {stats['items_per_s']:.1f}/s" if "items_per_s" in stats else ""
+        print(f"{name:24} p50 {stats['p50_ms']:10.2f} ms  p95 {stats['p95_ms']:10.2f} ms{rate}")
+    print(f"Results: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Deterministic synthetic ADGM corpora: uploaded .docx documents and reference trees."""
+from __future__ import annotations
+import os
+import random
+from typing import List
+
+from docx import Document
+
+from src.rules.checks import REQUIRED_INCORP_DOCS
+
+COMPANIES = ["Falcon Holdings", "Saadiyat Ventures", "Reem Capital", "Maryah Trading", "Gulf Ledger Technologies"]
+PEOPLE = ["A. Rahman", "J. Smith", "L. Chen", "M. Haddad", "P. Nair", "S. Okafor"]
+
+CLAUSES = [
+    "The Company is incorporated as a private company limited by shares under the Companies Regulations 2020.",
+    "The registered office of the Company shall be situated in the Abu Dhabi Global Market.",
+    "The objects of the Company are unrestricted save as limited by applicable law.",
+    "The liability of the members is limited to the amount, if any, unpaid on the shares held by them.",
+    "Any dispute arising out of or in connection with these documents shall be referred to the ADGM Courts.",
+    "Directors shall be appointed by ordinary resolution of the members.",
+    "The quorum for a meeting of the board shall be two directors present in person or by proxy.",
+    "Shares may be transferred by an instrument of transfer in any usual form approved by the directors.",
+    "The Company shall maintain a register of beneficial owners as required by the Registrar.",
+    "Notices may be given in writing to the address registered with the Registration Authority.",
+    "The financial year of the Company shall end on 31 December each year.",
+    "No alteration of these Articles shall be valid unless approved by special resolution.",
+]
+
+# Red flags the rule set and the LLM prompt are expected to catch
+RED_FLAGS = [
+    "Any dispute shall be governed by the UAE Federal Courts.",
+    "The share capital of the Company is AED TBD divided into ordinary shares.",
+    "The registered agent is [insert name of agent].",
+    "The effective date of this resolution is <insert date>.",
+    "The directors may act as they see fit without reference to any regulation.",
+]
+
+REFERENCE_TOPICS = [
+    ("Companies Regulations", "A company incorporated in ADGM must file its articles of association with the Registrar."),
+    ("Beneficial Ownership", "Every company must maintain a register of beneficial owners and file a UBO declaration."),
+    ("Registered Office", "Notice of a change of registered address must be filed within 14 days of the change."),
+    ("Resolutions", "Board and shareholder resolutions must be signed and dated by the authorised signatories."),
+    ("Jurisdiction", "Disputes relating to ADGM entities fall within the jurisdiction of the ADGM Courts."),
+    ("Share Capital", "The memorandum of association must state the authorised share capital of the company."),
+]
+
+
+def _paragraph(rng: random.Random, placeholder_rate: float) -> str:
+    sentences = rng.sample(CLAUSES, k=rng.randint(2, 4))
+    if rng.random() < placeholder_rate:
+        sentences.insert(rng.randint(0, len(sentences)), rng.choice(RED_FLAGS))
+    return " ".join(sentences)
+
+
+def generate_document(
+    path: str,
+    doc_type: str,
+    paragraphs: int = 40,
+    tables: int = 1,
+    placeholder_rate: float = 0.1,
+    seed: int = 0,
+) -> str:
+    """Write one incorporation document of ``doc_type`` with headings, clauses, tables and red flags."""
+    rng = random.Random(f"{seed}:{doc_type}:{path}")
+    company = rng.choice(COMPANIES)
+    doc = Document()
+    doc.add_heading(f"{doc_type} of {company} Limited", level=1)
+    doc.add_paragraph(f"This {doc_type.lower()} is made under the laws of the Abu Dhabi Global Market (ADGM).")
+    # Sections of roughly ten paragraphs, with tables spread between them
+    table_every = max(1, paragraphs // (tables + 1)) if tables else 0
+    made_tables = 0
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            doc.add_heading(f"{i // 10 + 1}. {rng.choice(REFERENCE_TOPICS)[0]}", level=2)
+        doc.add_paragraph(_paragraph(rng, placeholder_rate))
+        if table_every and made_tables < tables and (i + 1) % table_every == 0:
+            table = doc.add_table(rows=1, cols=3)
+            for cell, title in zip(table.rows[0].cells, ("Name", "Role", "Shares")):
+                cell.text = title
+            for person in rng.sample(PEOPLE, k=3):
+                row = table.add_row().cells
+                row[0].text = person
+                row[1].text = rng.choice(["Director", "Shareholder", "Secretary"])
+                row[2].text = rng.choice(["1,000", "2,500", "TBD", "[insert number]"])
+            made_tables += 1
+    if rng.random() >= placeholder_rate:
+        doc.add_paragraph(f"Signed by {rng.choice(PEOPLE)}, authorised signatory, for and on behalf of {company} Limited.")
+    doc.save(path)
+    return path
+
+
+def generate_corpus(
+    out_dir: str,
+    documents: int = 10,
+    paragraphs: int = 40,
+    tables: int = 1,
+    placeholder_rate: float = 0.1,
+    seed: int = 0,
+) -> List[str]:
+    """``documents`` .docx files cycling through the incorporation document types."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i in range(documents):
+        doc_type = REQUIRED_INCORP_DOCS[i % len(REQUIRED_INCORP_DOCS)]
+        path = os.path.join(out_dir, f"{i:04d}_{doc_type.replace(' ', '_')}.docx")
+        paths.append(generate_document(path, doc_type, paragraphs, tables, placeholder_rate, seed))
+    return paths
+
+
+def generate_reference_tree(out_dir: str, files: int = 20, paragraphs: int = 60, seed: int = 0) -> List[str]:
+    """Reference material as .docx and .txt files in nested folders, like ``data/reference``."""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(files):
+        title, rule = REFERENCE_TOPICS[i % len(REFERENCE_TOPICS)]
+        folder = os.path.join(out_dir, title.lower().replace(" ", "_"))
+        os.makedirs(folder, exist_ok=True)
+        body = [f"{title} guidance note {i + 1}.", rule]
+        body += [f"{j + 1}. {rule} {' '.join(rng.sample(CLAUSES, k=3))}" for j in range(paragraphs)]
+        if i % 2:
+            path = os.path.join(folder, f"guidance_{i:03d}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(body))
+        else:
+            path = os.path.join(folder, f"guidance_{i:03d}.docx")
+            doc = Document()
+            for line in body:
+                doc.add_paragraph(line)
+            doc.save(path)
+        paths.append(path)
+    return paths
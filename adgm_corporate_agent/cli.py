@@ -0,0 +1,170 @@
+"""Headless batch review: ``python cli.py INPUT_DIR [--output results.jsonl]``.
+
+Walks INPUT_DIR for .docx files and reviews them with the same pipeline as
+the Gradio app (which is never imported). One JSON line per document is
+appended to the output file as soon as it finishes; that file doubles as the
+checkpoint, so re-running the same command skips documents already reviewed.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Set
+
+from dotenv import load_dotenv
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+if CURRENT_DIR not in sys.path:
+    sys.path.append(CURRENT_DIR)
+
+from src.services import get_registry
+from src.pipeline import ReviewCancelled, compact_entry, review_document
+from src.utils.file_utils import StreamingZipWriter
+from src.utils.metrics import METRICS
+from src.utils.time_utils import now_timestamp_ist
+
+
+def iter_docx(root: str) -> Iterator[str]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            # Skip Word lock files and our own output
+            if name.lower().endswith(".docx") and not name.startswith("~$") and not name.endswith("_reviewed.docx"):
+                yield os.path.join(dirpath, name)
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """Relative paths already reviewed successfully in a previous run."""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    # errors="replace": an interrupted run may have cut a line inside a multi-byte character
+    with open(output_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["path"])
+    return done
+
+
+def terminate_partial_line(output_path: str) -> None:
+    """End a line cut short by an interrupted run, so the next record starts on its own line."""
+    if not os.path.exists(output_path) or not os.path.getsize(output_path):
+        return
+    # Binary mode: the cut may fall inside a multi-byte character
+    with open(output_path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Review a directory tree of ADGM .docx files without the UI.")
+    parser.add_argument("input_dir", help="Directory searched recursively for .docx files")
+    parser.add_argument("--output", default=None, help="JSONL results file (default: <outputs>/batch_results.jsonl)")
+    parser.add_argument("--reviewed-dir", default=None, help="Where reviewed .docx files go, mirroring the input tree (default: <outputs>/batch_reviewed)")
+    parser.add_argument("--zip", default=None, help="Also append each reviewed .docx to this ZIP as it is written")
+    parser.add_argument("--jobs", type=int, default=None, help="Documents in flight at once (default: max(LLM_CONCURRENCY, WORKERS))")
+    parser.add_argument("--rebuild-index", action="store_true", help="Wipe and rebuild the reference index first")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and review everything again")
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> int:
+    registry = get_registry()
+    services = registry.as_dict()
+    config = services["config"]
+    output_path = args.output or os.path.join(config.outputs_dir, "batch_results.jsonl")
+    reviewed_dir = args.reviewed_dir or os.path.join(config.outputs_dir, "batch_reviewed")
+    input_dir = os.path.abspath(args.input_dir)
+
+    print(services["indexer"].build_or_rebuild(force_rebuild=args.rebuild_index), file=sys.stderr)
+
+    if args.restart and os.path.exists(output_path):
+        os.remove(output_path)
+    done = load_checkpoint(output_path)
+    todo = [p for p in iter_docx(input_dir) if os.path.relpath(p, input_dir) not in done]
+    print(f"{len(done)} document(s) already reviewed, {len(todo)} to go.", file=sys.stderr)
+
+    jobs = max(1, args.jobs or max(config.llm_concurrency, config.workers))
+    cancel = threading.Event()
+    counts: Dict[str, int] = {"ok": 0, "error": 0}
+    started = time.perf_counter()
+
+    def review(path: str) -> Dict[str, object]:
+        rel = os.path.relpath(path, input_dir)
+        base, ext = os.path.splitext(rel)
+        reviewed_path = os.path.join(reviewed_dir, f"{base}_reviewed{ext}")
+        os.makedirs(os.path.dirname(reviewed_path), exist_ok=True)
+        start = time.perf_counter()
+        try:
+            result = review_document(services, path, cancel=cancel, reviewed_path=reviewed_path, archive=archive)
+        except ReviewCancelled:
+            raise
+        except Exception as e:
+            return {"path": rel, "status": "error", "error": f"{type(e).__name__}: {e}"[:500]}
+        record: Dict[str, object] = {"path": rel, "status": "ok", "reviewed_path": reviewed_path}
+        if config.summary_schema == "compact":
+            citations: Dict[str, object] = {}
+            record.update(compact_entry(result.entry, citations))
+            record["citations"] = citations
+        else:
+            record.update(result.entry)
+        record["elapsed"] = round(time.perf_counter() - start, 3)
+        record["timing"] = result.timing
+        record["timestamp"] = now_timestamp_ist()
+        return record
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    # Each reviewed file is appended as it is written, so the archive is never built at the end
+    archive = StreamingZipWriter(args.zip, mode="a", root=reviewed_dir) if args.zip else None
+    pool = ThreadPoolExecutor(max_workers=jobs)
+    pending = set()
+    queue = iter(todo)
+    try:
+        terminate_partial_line(output_path)
+        with open(output_path, "a", encoding="utf-8") as out:
+            while True:
+                # Bounded in-flight window: never more than 2x jobs futures for huge trees
+                for path in queue:
+                    pending.add(pool.submit(review, path))
+                    if len(pending) >= jobs * 2:
+                        break
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    record = fut.result()
+                    out.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                    out.flush()
+                    counts[record["status"]] += 1
+    except KeyboardInterrupt:
+        print("Interrupted; re-run the same command to resume.", file=sys.stderr)
+        return 130
+    finally:
+        cancel.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+        if archive is not None:
+            archive.close()
+        if config.metrics_file:
+            METRICS.write_prometheus(config.metrics_file)
+        print(
+            f"Reviewed {counts['ok']} document(s), {counts['error']} failed, in {time.perf_counter() - started:.1f}s. Results: {output_path}",
+            file=sys.stderr,
+        )
+    return 1 if counts["error"] else 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    load_dotenv()  # load .env if present
+    return run(parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,15 +8,54 @@ class AppConfig:
     data_reference_dir: str
     outputs_dir: str
     vectorstore_dir: str
+    cache_dir: str
+    jobs_dir: str
 
     llm_provider: str
     openai_api_key: str | None
     openai_base_url: str | None
+    openai_model: str
     google_api_key: str | None
     gemini_model: str
+    llm_concurrency: int
+    llm_requests_per_minute: float
+    llm_timeout: float
+    llm_max_retries: int
+    llm_cache_enabled: bool
+    llm_cache_max_bytes: int
+    llm_review_mode: str
+    llm_window_tokens: int
+    review_cache_enabled: bool
+    review_cache_max_bytes: int
 
     embeddings_provider: str
     embeddings_model: str
+    embeddings_backend: str
+    embeddings_batch_size: int
+    embeddings_threads: int
+
+    index_batch_size: int
+    extract_workers: int
+    workers: int
+    summary_schema: str
+    summary_indent: int
+    api_host: str
+    api_port: int
+    job_workers: int
+    job_queue_limit: int
+    job_max_upload_bytes: int
+    metrics_file: str
+    profile_slow_seconds: float
+    profile_mode: str
+    extract_timeout: float
+    extract_retry_seconds: float
+    fetch_workers: int
+    fetch_timeout: float
+    url_refresh_seconds: float
+    retrieval_cache_size: int
+    retrieval_cache_ttl: float
+    vector_backend: str
+    retrieval_mode: str
 
     timezone: str
 
@@ -27,15 +66,53 @@ class AppConfig:
         data_reference_dir = os.path.join(project_root, "data", "reference")
         outputs_dir = os.path.join(project_root, "outputs")
         vectorstore_dir = os.path.join(project_root, "vectorstore")
+        cache_dir = os.path.join(project_root, "cache")
+        jobs_dir = os.path.join(project_root, "jobs")
 
         llm_provider = os.getenv("LLM_PROVIDER", "none").lower()
         openai_api_key = os.getenv("OPENAI_API_KEY")
         openai_base_url = os.getenv("OPENAI_BASE_URL")
+        openai_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         google_api_key = os.getenv("GOOGLE_API_KEY")
         gemini_model = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+        llm_concurrency = int(os.getenv("LLM_CONCURRENCY", "4"))
+        llm_requests_per_minute = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+        llm_timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+        llm_max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+        llm_cache_enabled = os.getenv("LLM_CACHE", "1").lower() not in ("0", "false", "no", "off")
+        llm_cache_max_bytes = int(float(os.getenv("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024)
+        llm_review_mode = os.getenv("LLM_REVIEW_MODE", "map_reduce").lower()
+        llm_window_tokens = int(os.getenv("LLM_WINDOW_TOKENS", "2000"))
+        review_cache_enabled = os.getenv("REVIEW_CACHE", "1").lower() not in ("0", "false", "no", "off")
+        review_cache_max_bytes = int(float(os.getenv("REVIEW_CACHE_MAX_MB", "256")) * 1024 * 1024)
 
         embeddings_provider = os.getenv("EMBEDDINGS_PROVIDER", "hf").lower()
         embeddings_model = os.getenv("EMBEDDINGS_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        embeddings_backend = os.getenv("EMBEDDINGS_BACKEND", "torch").lower()
+        embeddings_batch_size = int(os.getenv("EMBEDDINGS_BATCH_SIZE", "32"))
+        embeddings_threads = int(os.getenv("EMBEDDINGS_THREADS", "0"))
+        index_batch_size = int(os.getenv("INDEX_BATCH_SIZE", "64"))
+        extract_workers = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+        workers = int(os.getenv("WORKERS", "1"))
+        summary_schema = os.getenv("SUMMARY_SCHEMA", "compact").lower()
+        summary_indent = int(os.getenv("SUMMARY_INDENT", "2"))
+        api_host = os.getenv("API_HOST", "127.0.0.1")
+        api_port = int(os.getenv("API_PORT", "8000"))
+        job_workers = int(os.getenv("JOB_WORKERS", "2"))
+        job_queue_limit = int(os.getenv("JOB_QUEUE_LIMIT", "100"))
+        job_max_upload_bytes = int(float(os.getenv("JOB_MAX_UPLOAD_MB", "50")) * 1024 * 1024)
+        metrics_file = os.getenv("METRICS_FILE", "")
+        profile_slow_seconds = float(os.getenv("PROFILE_SLOW_SECONDS", "0"))
+        profile_mode = os.getenv("PROFILE_MODE", "cprofile").lower()
+        extract_timeout = float(os.getenv("EXTRACT_TIMEOUT", "120"))
+        extract_retry_seconds = float(os.getenv("EXTRACT_RETRY_SECONDS", "3600"))
+        fetch_workers = int(os.getenv("FETCH_WORKERS", "8"))
+        fetch_timeout = float(os.getenv("FETCH_TIMEOUT", "20"))
+        url_refresh_seconds = float(os.getenv("URL_REFRESH_SECONDS", "86400"))
+        retrieval_cache_size = int(os.getenv("RETRIEVAL_CACHE_SIZE", "256"))
+        retrieval_cache_ttl = float(os.getenv("RETRIEVAL_CACHE_TTL", "3600"))
+        vector_backend = os.getenv("VECTOR_BACKEND", "chroma").lower()
+        retrieval_mode = os.getenv("RETRIEVAL_MODE", "dense").lower()
 
         timezone = os.getenv("TIMEZONE", "Asia/Kolkata")
 
@@ -44,13 +121,51 @@ class AppConfig:
             data_reference_dir=data_reference_dir,
             outputs_dir=outputs_dir,
             vectorstore_dir=vectorstore_dir,
+            cache_dir=cache_dir,
+            jobs_dir=jobs_dir,
             llm_provider=llm_provider,
             openai_api_key=openai_api_key,
             openai_base_url=openai_base_url,
+            openai_model=openai_model,
             google_api_key=google_api_key,
             gemini_model=gemini_model,
+            llm_concurrency=llm_concurrency,
+            llm_requests_per_minute=llm_requests_per_minute,
+            llm_timeout=llm_timeout,
+            llm_max_retries=llm_max_retries,
+            llm_cache_enabled=llm_cache_enabled,
+            llm_cache_max_bytes=llm_cache_max_bytes,
+            llm_review_mode=llm_review_mode,
+            llm_window_tokens=llm_window_tokens,
+            review_cache_enabled=review_cache_enabled,
+            review_cache_max_bytes=review_cache_max_bytes,
             embeddings_provider=embeddings_provider,
             embeddings_model=embeddings_model,
+            embeddings_backend=embeddings_backend,
+            embeddings_batch_size=embeddings_batch_size,
+            embeddings_threads=embeddings_threads,
+            index_batch_size=index_batch_size,
+            extract_workers=extract_workers,
+            workers=workers,
+            summary_schema=summary_schema,
+            summary_indent=summary_indent,
+            api_host=api_host,
+            api_port=api_port,
+            job_workers=job_workers,
+            job_queue_limit=job_queue_limit,
+            job_max_upload_bytes=job_max_upload_bytes,
+            metrics_file=metrics_file,
+            profile_slow_seconds=profile_slow_seconds,
+            profile_mode=profile_mode,
+            extract_timeout=extract_timeout,
+            extract_retry_seconds=extract_retry_seconds,
+            fetch_workers=fetch_workers,
+            fetch_timeout=fetch_timeout,
+            url_refresh_seconds=url_refresh_seconds,
+            retrieval_cache_size=retrieval_cache_size,
+            retrieval_cache_ttl=retrieval_cache_ttl,
+            vector_backend=vector_backend,
+            retrieval_mode=retrieval_mode,
             timezone=timezone,
         )
 
@@ -1,22 +1,116 @@
-from typing import List, Dict, Any
-from docx import Document
-from docx.enum.text import WD_COLOR_INDEX
+from __future__ import annotations
+import bisect
+import io
+from typing import List, Dict, Any, Tuple
+
+from src.docx_tools.parser import DocumentModel, parse_docx
+from src.utils.text_search import first_occurrences, normalize_for_search
+
+
+class RunIndex:
+    """Lowercased, whitespace-collapsed text of every run in the document, with an offset-to-run map.
+
+    Covers body paragraphs and table cells (in ``DocumentModel.blocks`` order,
+    recording each block's range) followed by headers and footers. Paragraphs
+    are joined by a single space, so snippets spanning paragraphs still match.
+    """
+
+    def __init__(self, model: DocumentModel):
+        self.runs: List[Any] = []
+        self.starts: List[int] = []
+        self.block_ranges: List[Tuple[int, int]] = []
+        self._parts: List[str] = []
+        self._size = 0
+        for block in model.blocks:
+            begin = self._size
+            self._add_paragraphs(block.paragraphs)
+            self.block_ranges.append((begin, self._size))
+        for paragraphs in _header_footer_paragraphs(model.doc):
+            self._add_paragraphs(paragraphs)
+        self.text = "".join(self._parts)
+
+    def _append(self, text: str, run: Any | None) -> None:
+        if self._parts and self._parts[-1].endswith(" ") and text.startswith(" "):
+            text = text[1:]
+        if not text:
+            return
+        if run is not None:
+            self.runs.append(run)
+            self.starts.append(self._size)
+        self._parts.append(text)
+        self._size += len(text)
+
+    def _add_paragraphs(self, paragraphs: List[Any]) -> None:
+        for para in paragraphs:
+            for item in para.iter_inner_content():
+                # Hyperlinks hold their own runs
+                for run in getattr(item, "runs", [item]):
+                    self._append(normalize_for_search(run.text), run)
+            self._append(" ", None)
+
+    def runs_between(self, start: int, end: int) -> List[Any]:
+        if not self.runs or end <= start:
+            return []
+        first = max(0, bisect.bisect_right(self.starts, start) - 1)
+        last = max(0, bisect.bisect_right(self.starts, end - 1) - 1)
+        return self.runs[first:last + 1]
+
+
+def _header_footer_paragraphs(doc: Any) -> List[List[Any]]:
+    out: List[List[Any]] = []
+    for section in doc.sections:
+        for part in (section.header, section.footer):
+            # A linked header/footer has no definition of its own; touching it would create one
+            if part.is_linked_to_previous:
+                continue
+            out.append(list(part.paragraphs))
+            for table in part.tables:
+                for row in table.rows:
+                    for cell in row.cells:
+                        out.append(list(cell.paragraphs))
+    return out
+
+
+def _highlight(runs: List[Any]) -> None:
+    from docx.enum.text import WD_COLOR_INDEX
+    for run in runs:
+        run.font.highlight_color = WD_COLOR_INDEX.YELLOW
 
 
 def annotate_docx_with_issues(input_path: str, issues: List[Dict[str, Any]], output_path: str) -> None:
-    doc = Document(input_path)
+    annotate_document(parse_docx(input_path), issues, output_path)
+
+
+def annotate_document(model: DocumentModel, issues: List[Dict[str, Any]], output_path: str) -> bytes:
+    """Highlight the runs each issue points at in ``model.doc``, append review notes and save.
+
+    Returns the saved file's bytes so callers can archive it without reading it back.
 
-    # Build a simple index: look for mentioned clause/section text in paragraphs and highlight
+    Issues carrying a ``location`` (offsets into ``model.text``) are searched
+    for within that paragraph or cell only; all other snippets are located
+    together in one pass over the document's run index.
+    """
+    doc = model.doc
+    index = RunIndex(model)
+
+    pending: List[str] = []
     for issue in issues:
-        snippet = issue.get("snippet") or issue.get("issue") or ""
-        if not snippet:
+        location = issue.get("location")
+        if location and location.get("block") is not None and location["block"] < len(index.block_ranges):
+            needle = normalize_for_search(model.text[location["start"]:location["end"]]).strip()
+            begin, end = index.block_ranges[location["block"]]
+            pos = index.text.find(needle, begin, end) if needle else -1
+            if pos >= 0:
+                _highlight(index.runs_between(pos, pos + len(needle)))
             continue
-        lowered = snippet[:100].lower()
-        for para in doc.paragraphs:
-            if lowered and lowered in para.text.lower():
-                for run in para.runs:
-                    run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-                break
+        snippet = issue.get("snippet") or issue.get("issue") or ""
+        pending.append(normalize_for_search(snippet[:100]).strip())
+
+    found = first_occurrences(index.text, pending)
+    for needle in set(pending):
+        pos = found.get(needle)
+        if pos is not None:
+            _highlight(index.runs_between(pos, pos + len(needle)))
 
     # Append review notes section
     doc.add_page_break()
@@ -34,6 +128,11 @@ def annotate_docx_with_issues(input_path: str, issues: List[Dict[str, Any]], out
         for s_idx, src in enumerate(sources[:3], start=1):
             doc.add_paragraph(f"   Source {s_idx}: {src.get('source')} — {src.get('snippet')}")
 
-    doc.save(output_path)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    data = buffer.getvalue()
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return data
 
 
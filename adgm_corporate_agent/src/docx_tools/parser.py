@@ -1,16 +1,83 @@
-from typing import List
-from docx import Document
+from __future__ import annotations
+import bisect
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, List
 
 
-def read_docx_text(path: str) -> str:
-    doc = Document(path)
-    parts: List[str] = []
-    for p in doc.paragraphs:
-        parts.append(p.text)
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                parts.append(cell.text)
-    return "\n".join([t for t in parts if t and t.strip()])
+@dataclass
+class Block:
+    """One non-empty paragraph or table cell; ``start``/``end`` index into ``DocumentModel.text``."""
+
+    kind: str  # "paragraph" or "cell"
+    text: str
+    start: int
+    end: int
+    obj: Any  # python-docx Paragraph or _Cell
+
+    @property
+    def paragraphs(self) -> List[Any]:
+        return [self.obj] if self.kind == "paragraph" else list(self.obj.paragraphs)
+
+
+class DocumentModel:
+    """A DOCX parsed once: blocks with character offsets, text views and the live document.
+
+    ``text`` is the same newline-joined text ``read_docx_text`` has always
+    returned. Annotation edits ``doc`` in place.
+    """
+
+    def __init__(self, doc: Any, path: str | None = None):
+        self.doc = doc
+        self.path = path
+        self.blocks: List[Block] = []
+        parts: List[str] = []
+        offset = 0
+        items = [("paragraph", p, p.text) for p in doc.paragraphs]
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    items.append(("cell", cell, cell.text))
+        for kind, obj, text in items:
+            if not text or not text.strip():
+                continue
+            self.blocks.append(Block(kind=kind, text=text, start=offset, end=offset + len(text), obj=obj))
+            parts.append(text)
+            offset += len(text) + 1
+        self.text = "\n".join(parts)
+        self._starts = [b.start for b in self.blocks]
+
+    @cached_property
+    def lower(self) -> str:
+        # Same length as ``text`` (offsets stay valid) for ASCII/Latin text
+        return self.text.lower()
 
+    @cached_property
+    def normalized(self) -> str:
+        return re.sub(r"\s+", " ", self.text).strip().lower()
 
+    @property
+    def paragraph_texts(self) -> List[str]:
+        return [b.text for b in self.blocks]
+
+    def block_at(self, offset: int) -> int:
+        """Index of the block containing ``offset`` (a separator maps to the block before it)."""
+        return max(0, bisect.bisect_right(self._starts, offset) - 1)
+
+    def blocks_between(self, start: int, end: int) -> List[Block]:
+        if not self.blocks:
+            return []
+        return self.blocks[self.block_at(start):self.block_at(max(start, end - 1)) + 1]
+
+    def location(self, start: int, end: int) -> dict:
+        return {"block": self.block_at(start), "start": start, "end": end}
+
+
+def parse_docx(path: str) -> DocumentModel:
+    from docx import Document
+    return DocumentModel(Document(path), path=path)
+
+
+def read_docx_text(path: str) -> str:
+    return parse_docx(path).text
@@ -0,0 +1,245 @@
+from __future__ import annotations
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+from src.pipeline import build_summary, review_document, reviewed_name
+from src.utils.file_utils import StreamingZipWriter, save_json
+from src.utils.metrics import METRICS, span
+
+JOB_STATES = ("queued", "running", "done", "failed")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobStore:
+    """Persistent FIFO job queue in SQLite.
+
+    Each job owns ``<jobs_dir>/<id>/input`` (the submitted documents) and
+    ``<jobs_dir>/<id>/output`` (reviewed files, summary JSON and ZIP). Jobs left
+    ``running`` by a crashed process are re-queued when the store is opened.
+    """
+
+    def __init__(self, jobs_dir: str, queue_limit: int = 100):
+        self.jobs_dir = jobs_dir
+        self.queue_limit = queue_limit
+        os.makedirs(jobs_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._conn = sqlite3.connect(os.path.join(jobs_dir, "jobs.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, status TEXT NOT NULL, created REAL NOT NULL,"
+            " started REAL, finished REAL, files INTEGER NOT NULL,"
+            " summary TEXT, error TEXT, timings TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs(status, created)")
+        self._conn.execute("UPDATE jobs SET status = 'queued', started = NULL WHERE status = 'running'")
+        self._conn.commit()
+
+    def job_dir(self, job_id: str, kind: str = "") -> str:
+        return os.path.join(self.jobs_dir, job_id, kind) if kind else os.path.join(self.jobs_dir, job_id)
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        out = {state: 0 for state in JOB_STATES}
+        out.update(dict(rows))
+        return out
+
+    def submit(self, files: Dict[str, bytes]) -> str:
+        """Store the documents and queue a job; raises ``QueueFull`` at the queue-depth limit."""
+        job_id = uuid.uuid4().hex
+        input_dir = self.job_dir(job_id, "input")
+        os.makedirs(input_dir, exist_ok=True)
+        os.makedirs(self.job_dir(job_id, "output"), exist_ok=True)
+        for name, data in files.items():
+            with open(os.path.join(input_dir, os.path.basename(name)), "wb") as f:
+                f.write(data)
+        with self._wakeup:
+            depth = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if depth >= self.queue_limit:
+                shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+                raise QueueFull(depth)
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, created, files) VALUES (?, 'queued', ?, ?)",
+                (job_id, time.time(), len(files)),
+            )
+            self._conn.commit()
+            self._wakeup.notify()
+        return job_id
+
+    def claim(self, timeout: float = 1.0) -> Dict[str, Any] | None:
+        """Mark the oldest queued job running and return it, waiting up to ``timeout`` for one."""
+        with self._wakeup:
+            row = self._next_queued()
+            if row is None:
+                self._wakeup.wait(timeout)
+                row = self._next_queued()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE jobs SET status = 'running', started = ? WHERE id = ?", (time.time(), row[0]))
+            self._conn.commit()
+        return self.get(row[0])
+
+    def _next_queued(self):
+        return self._conn.execute(
+            "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+        ).fetchone()
+
+    def finish(self, job_id: str, summary: Dict[str, Any] | None, timings: Dict[str, Any], error: str | None = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, summary = ?, error = ?, timings = ? WHERE id = ?",
+                (
+                    "failed" if error else "done",
+                    time.time(),
+                    json.dumps(summary, ensure_ascii=False) if summary is not None else None,
+                    error,
+                    json.dumps(timings),
+                    job_id,
+                ),
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, created, started, finished, files, summary, error, timings FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(("id", "status", "created", "started", "finished", "files", "summary", "error", "timings"), row))
+        job["summary"] = json.loads(job["summary"]) if job["summary"] else None
+        job["timings"] = json.loads(job["timings"]) if job["timings"] else None
+        return job
+
+    def artifacts(self, job_id: str) -> List[str]:
+        output_dir = self.job_dir(job_id, "output")
+        return sorted(os.listdir(output_dir)) if os.path.isdir(output_dir) else []
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def run_job(services: Dict[str, Any], store: JobStore, job: Dict[str, Any]) -> Dict[str, Any]:
+    """Review every document of ``job`` and write its summary JSON and ZIP; returns the summary."""
+    job_id = job["id"]
+    input_dir = store.job_dir(job_id, "input")
+    output_dir = store.job_dir(job_id, "output")
+    timings: Dict[str, Any] = {"queue_wait": round(job["started"] - job["created"], 3), "stages": {}, "documents": {}}
+    stages: Dict[str, float] = timings["stages"]
+    start = time.perf_counter()
+
+    def timed_stages() -> Callable[[str], None]:
+        state = {"stage": None, "at": time.perf_counter()}
+
+        def on_stage(name: str) -> None:
+            now = time.perf_counter()
+            if state["stage"] is not None:
+                stages[state["stage"]] = round(stages.get(state["stage"], 0.0) + now - state["at"], 4)
+            state["stage"], state["at"] = (None if name == "done" else name), now
+        return on_stage
+
+    reviews = []
+    paths = sorted(os.path.join(input_dir, n) for n in os.listdir(input_dir))
+    config = services["config"]
+    archive = StreamingZipWriter(os.path.join(output_dir, "reviewed_docs.zip"))
+    try:
+        with span("job", job=job_id, documents=len(paths)) as root:
+            for path in paths:
+                doc_start = time.perf_counter()
+                reviews.append(review_document(
+                    services,
+                    path,
+                    on_stage=timed_stages(),
+                    reviewed_path=reviewed_name(path, output_dir),
+                    archive=archive,
+                ))
+                timings["documents"][os.path.basename(path)] = round(time.perf_counter() - doc_start, 4)
+
+            write_start = time.perf_counter()
+            with span("outputs"):
+                archive.close()
+                summary = build_summary(reviews, len(paths), compact=config.summary_schema == "compact")
+            stages["outputs"] = round(time.perf_counter() - write_start, 4)
+        summary["timing"] = root.to_dict()
+        save_json(summary, os.path.join(output_dir, "summary.json"), indent=config.summary_indent)
+    except Exception as e:
+        archive.close()
+        timings["total"] = round(time.perf_counter() - start, 3)
+        store.finish(job_id, None, timings, error=f"{type(e).__name__}: {e}"[:500])
+        METRICS.inc("adgm_jobs_total", help_text="Jobs finished by the job workers.", status="failed")
+        raise
+    timings["total"] = round(time.perf_counter() - start, 3)
+    store.finish(job_id, summary, timings)
+    METRICS.inc("adgm_jobs_total", help_text="Jobs finished by the job workers.", status="done")
+    if config.metrics_file:
+        METRICS.write_prometheus(config.metrics_file)
+    return summary
+
+
+class JobWorkers:
+    """Background threads that drain the job queue using the process-wide warm services."""
+
+    def __init__(self, store: JobStore, services_factory: Callable[[], Dict[str, Any]], workers: int):
+        self.store = store
+        self.services_factory = services_factory
+        self.workers = max(1, workers)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+
+    @property
+    def busy(self) -> int:
+        return self._busy
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            job = self.store.claim(timeout=1.0)
+            if job is None:
+                continue
+            with self._busy_lock:
+                self._busy += 1
+            try:
+                self._run(job)
+            finally:
+                with self._busy_lock:
+                    self._busy -= 1
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        try:
+            run_job(self.services_factory(), self.store, job)
+        except Exception as e:
+            # run_job records failures during the review itself; anything raised earlier (e.g. the
+            # services failing to load after a reload with a bad config) must not leave the job running
+            current = self.store.get(job["id"])
+            if current is not None and current["status"] == "running":
+                self.store.finish(job["id"], None, {}, error=f"{type(e).__name__}: {e}"[:500])
+                METRICS.inc("adgm_jobs_total", help_text="Jobs finished by the job workers.", status="failed")
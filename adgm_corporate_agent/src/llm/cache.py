@@ -0,0 +1,29 @@
+from __future__ import annotations
+import hashlib
+import json
+from typing import Any, Dict, List
+
+from src.utils.cache_utils import SQLiteLRUCache
+
+
+def make_cache_key(provider: str, model: str, system: str, prompt: str, temperature: float, endpoint: str = "") -> str:
+    parts = [provider, model, system, prompt, temperature]
+    if endpoint:
+        # Only custom endpoints are keyed, so entries for the default API keep their keys
+        parts.append(endpoint)
+    payload = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache(SQLiteLRUCache):
+    """Persistent, size-bounded cache of parsed LLM issue lists (SQLite, LRU eviction)."""
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        super().__init__(path, max_bytes, table="responses")
+
+    def get(self, key: str) -> List[Dict[str, Any]] | None:
+        value = super().get(key)
+        return json.loads(value) if value is not None else None
+
+    def put(self, key: str, issues: List[Dict[str, Any]]) -> None:
+        super().put(key, json.dumps(issues, ensure_ascii=False))
@@ -1,19 +1,53 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Dict, Any, Tuple
 
 from src.config import AppConfig
+from src.llm.cache import LLMResponseCache, make_cache_key
+from src.llm.concurrency import TokenBucket, call_with_retries
+from src.llm.windows import merge_issues, split_into_windows
+from src.utils.metrics import METRICS, bind_context, span
 
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None  # type: ignore
 
-try:
-    import google.generativeai as genai  # type: ignore
-except Exception:
-    genai = None  # type: ignore
+@dataclass
+class LLMResult:
+    issues: List[Dict[str, Any]] = field(default_factory=list)
+    error: str | None = None
+    attempts: int = 0
+    elapsed: float = 0.0
+    cached: bool = False
+
+
+def parse_issues(content: str) -> List[Dict[str, Any]]:
+    # Robust JSON parsing fallback
+    issues: Any = []
+    try:
+        issues = json.loads(content)
+    except Exception:
+        # try to extract JSON array
+        m = re.search(r"\[[\s\S]*\]", content)
+        if m:
+            try:
+                issues = json.loads(m.group(0))
+            except Exception:
+                issues = []
+    if isinstance(issues, dict):
+        issues = next((v for v in issues.values() if isinstance(v, list)), [issues])
+    issues = [iss for iss in issues if isinstance(iss, dict)] if isinstance(issues, list) else []
+    for iss in issues:
+        iss.setdefault("severity", "Medium")
+    return issues
+
 
 class LLMClient:
+    TEMPERATURE = 0.2
+
     def __init__(self, config: AppConfig):
         self.config = config
         self.is_enabled = config.llm_provider != "none"
@@ -21,9 +55,30 @@ class LLMClient:
         self.client = None  # OpenAI client when provider == openai
         self.gemini_model = None  # Google Generative AI model when provider == gemini
         self.is_ready = False
+        # Shared by every caller in the process so concurrent reviews respect one budget
+        self.rate_limiter = TokenBucket(config.llm_requests_per_minute / 60.0, capacity=max(1, config.llm_concurrency))
+        # Caps calls in flight across all callers (documents, windows, jobs), not just within one review_many
+        self._in_flight = threading.BoundedSemaphore(max(1, config.llm_concurrency))
+        self.cache: LLMResponseCache | None = None
+        if self.is_enabled and config.llm_cache_enabled:
+            self.cache = LLMResponseCache(os.path.join(config.cache_dir, "llm_responses.sqlite3"), max_bytes=config.llm_cache_max_bytes)
+
+        # Provider SDKs are imported only for the configured provider
+        OpenAI = genai = None
+        if self.is_enabled and self.provider == "openai":
+            try:
+                from openai import OpenAI
+            except Exception:
+                pass
+        elif self.is_enabled and self.provider == "gemini":
+            try:
+                import google.generativeai as genai  # type: ignore
+            except Exception:
+                pass
 
         if self.is_enabled and self.provider == "openai" and OpenAI is not None:
-            kwargs = {}
+            # Retries are handled by call_with_retries so backoff and rate limiting stay in one place
+            kwargs: Dict[str, Any] = {"timeout": config.llm_timeout, "max_retries": 0}
             if config.openai_base_url:
                 kwargs["base_url"] = config.openai_base_url
             self.client = OpenAI(api_key=config.openai_api_key, **kwargs)
@@ -37,67 +92,195 @@ class LLMClient:
             except Exception:
                 self.is_ready = False
 
-    def analyze_document(self, text: str, doc_type: str, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    @property
+    def model_name(self) -> str:
+        if self.provider == "gemini":
+            return self.config.gemini_model or "gemini-1.5-flash"
+        return self.config.openai_model
+
+    @property
+    def endpoint(self) -> str:
+        # Servers behind OPENAI_BASE_URL may reuse model names, so the URL is part of the identity
+        return (self.config.openai_base_url or "") if self.provider == "openai" else ""
+
+    @property
+    def fingerprint(self) -> str:
+        """Settings that shape a document's LLM findings; "none" when the LLM is not used."""
         if not self.is_enabled or not self.is_ready:
-            return []
+            return "none"
+        return json.dumps([self.provider, self.endpoint, self.model_name, self.TEMPERATURE, self.config.llm_review_mode, self.config.llm_window_tokens])
 
+    def _build_prompt(self, text: str, doc_type: str, contexts: List[Dict[str, Any]], part: Tuple[int, int] | None = None) -> Tuple[str, str]:
         system = (
             "You are a legal compliance assistant for ADGM. "
             "Identify ambiguous language, missing clauses, and ADGM non-compliance. "
             "Return compact, actionable issues with severity 'Medium' and concise suggestions."
         )
         ctx_str = "\n\n".join([f"Source: {c.get('source')}\n{c.get('snippet')}" for c in contexts[:5]])
+        if part is None:
+            content = f"Document content (truncated):\n{text[:4000]}"
+        else:
+            content = f"Document content (part {part[0]} of {part[1]}):\n{text}"
         prompt = (
             f"Document type: {doc_type}\n" \
             f"Context (ADGM references):\n{ctx_str}\n\n" \
-            f"Document content (truncated):\n{text[:4000]}\n\n" \
+            f"{content}\n\n" \
             "List up to 5 issues as JSON with keys: section (if any), issue, severity, suggestion."
         )
+        return system, prompt
+
+    def _count_tokens(self, prompt_tokens: int | None, completion_tokens: int | None) -> None:
+        help_text = "LLM tokens reported by the provider."
+        METRICS.inc("adgm_llm_tokens_total", prompt_tokens or 0, help_text, kind="prompt", provider=self.provider)
+        METRICS.inc("adgm_llm_tokens_total", completion_tokens or 0, help_text, kind="completion", provider=self.provider)
+
+    def _complete(self, system: str, prompt: str) -> str:
+        # Single provider round trip; raises on failure so callers can retry or report
+        if self.provider == "openai" and self.client is not None:
+            resp = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=self.TEMPERATURE,
+            )
+            usage = getattr(resp, "usage", None)
+            self._count_tokens(getattr(usage, "prompt_tokens", 0), getattr(usage, "completion_tokens", 0))
+            return resp.choices[0].message.content or "[]"
+        if self.provider == "gemini" and self.gemini_model is not None:
+            # Send system + user prompt as parts
+            resp = self.gemini_model.generate_content([system, prompt], request_options={"timeout": self.config.llm_timeout})
+            usage = getattr(resp, "usage_metadata", None)
+            self._count_tokens(getattr(usage, "prompt_token_count", 0), getattr(usage, "candidates_token_count", 0))
+            # Prefer response.text; fallback to first candidate content parts
+            if hasattr(resp, "text") and resp.text:
+                return resp.text
+            try:
+                return resp.candidates[0].content.parts[0].text  # type: ignore
+            except Exception:
+                return "[]"
+        return "[]"
+
+    def review(self, text: str, doc_type: str, contexts: List[Dict[str, Any]], use_cache: bool = True, part: Tuple[int, int] | None = None) -> LLMResult:
+        """Analyse one document, retrying transient failures; errors are reported, not raised.
+
+        Parsed issues are cached by provider, model, prompts and temperature;
+        ``use_cache=False`` bypasses the lookup but still refreshes the entry.
+        """
+        if not self.is_enabled or not self.is_ready:
+            return LLMResult()
+        with span("llm_call", part=f"{part[0]}/{part[1]}" if part else None) as s:
+            result = self._review(text, doc_type, contexts, use_cache, part)
+            s.attrs.update(cached=result.cached, attempts=result.attempts, error=bool(result.error))
+        if result.cached:
+            METRICS.inc("adgm_llm_cache_hits_total", help_text="LLM reviews served from the response cache.")
+        else:
+            METRICS.inc("adgm_llm_calls_total", help_text="LLM reviews sent to the provider.", outcome="error" if result.error else "ok")
+            METRICS.inc("adgm_llm_retries_total", max(0, result.attempts - 1), "LLM call retries after transient errors.")
+        return result
+
+    def _review(self, text: str, doc_type: str, contexts: List[Dict[str, Any]], use_cache: bool, part: Tuple[int, int] | None) -> LLMResult:
+        system, prompt = self._build_prompt(text, doc_type, contexts, part=part)
+        start = time.perf_counter()
+        key = make_cache_key(self.provider, self.model_name, system, prompt, self.TEMPERATURE, self.endpoint)
+        if self.cache is not None and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return LLMResult(issues=cached, cached=True, elapsed=time.perf_counter() - start)
+        attempts = 0
+
+        def attempt() -> str:
+            nonlocal attempts
+            attempts += 1
+            with self._in_flight:
+                self.rate_limiter.acquire()
+                return self._complete(system, prompt)
 
-        content = "[]"
         try:
-            if self.provider == "openai" and self.client is not None:
-                resp = self.client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": system},
-                        {"role": "user", "content": prompt},
-                    ],
-                    temperature=0.2,
-                )
-                content = resp.choices[0].message.content or "[]"
-            elif self.provider == "gemini" and self.gemini_model is not None:
-                # Send system + user prompt as parts
-                resp = self.gemini_model.generate_content([system, prompt])
-                # Prefer response.text; fallback to first candidate content parts
-                if hasattr(resp, "text") and resp.text:
-                    content = resp.text
-                else:
-                    try:
-                        content = resp.candidates[0].content.parts[0].text  # type: ignore
-                    except Exception:
-                        content = "[]"
-            else:
-                return []
-        except Exception:
+            content = call_with_retries(attempt, max_retries=self.config.llm_max_retries)
+        except Exception as e:
+            return LLMResult(error=f"{type(e).__name__}: {e}"[:500], attempts=attempts, elapsed=time.perf_counter() - start)
+        issues = parse_issues(content)
+        if self.cache is not None:
+            self.cache.put(key, issues)
+        return LLMResult(issues=issues, attempts=attempts, elapsed=time.perf_counter() - start)
+
+    def review_many(self, jobs: List[Dict[str, Any]], use_cache: bool = True) -> List[LLMResult]:
+        """Analyse several documents concurrently (``text``/``doc_type``/``contexts`` per job).
+
+        At most ``LLM_CONCURRENCY`` provider calls are in flight per client, however
+        many callers run ``review_many`` at once; results keep the input order.
+        """
+        if not jobs:
             return []
+        if not self.is_enabled or not self.is_ready:
+            return [LLMResult() for _ in jobs]
+        workers = max(1, min(self.config.llm_concurrency, len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(
+                bind_context(lambda job: self.review(job["text"], job["doc_type"], job["contexts"], use_cache=use_cache, part=job.get("part"))),
+                jobs,
+            ))
 
-        # Robust JSON parsing fallback
-        issues: List[Dict[str, Any]] = []
-        import json
-        try:
-            issues = json.loads(content)
-        except Exception:
-            # try to extract JSON array
-            import re
-            m = re.search(r"\[[\s\S]*\]", content)
-            if m:
-                try:
-                    issues = json.loads(m.group(0))
-                except Exception:
-                    issues = []
-        for iss in issues:
-            iss.setdefault("severity", "Medium")
-        return issues
+    def review_documents(
+        self,
+        jobs: List[Dict[str, Any]],
+        retrieve_many: Callable[[List[str]], List[List[Dict[str, Any]]]] | None = None,
+        use_cache: bool = True,
+    ) -> List[LLMResult]:
+        """Review whole documents, map-reduce style when ``LLM_REVIEW_MODE=map_reduce``.
 
+        Each document is split on paragraph/section boundaries into windows of
+        ``LLM_WINDOW_TOKENS``; every window of every document is reviewed
+        concurrently (with its own contexts when ``retrieve_many`` is given) and
+        the partial issue lists are merged and deduplicated per document. In
+        ``truncate`` mode only the first 4000 characters are sent, as before.
+        Every issue carries the contexts it was reviewed against as
+        ``source_citations``.
+        """
+        if self.config.llm_review_mode != "map_reduce" or not self.is_enabled or not self.is_ready:
+            results = self.review_many(jobs, use_cache=use_cache)
+            for job, result in zip(jobs, results):
+                result.issues = [{**issue, "source_citations": job["contexts"]} for issue in result.issues]
+            return results
 
+        window_jobs: List[Dict[str, Any]] = []
+        owners: List[int] = []
+        for idx, job in enumerate(jobs):
+            windows = split_into_windows(job.get("paragraphs") or job["text"], self.config.llm_window_tokens) or [""]
+            for w_idx, window in enumerate(windows, start=1):
+                window_jobs.append({
+                    "text": window,
+                    "doc_type": job["doc_type"],
+                    "contexts": job["contexts"],
+                    "part": (w_idx, len(windows)),
+                })
+                owners.append(idx)
+
+        if retrieve_many is not None and len(window_jobs) > len(jobs):
+            # One batched retrieval for all windows: each window is grounded in its own references
+            queries = [f"ADGM rules related to {wj['doc_type']}: {wj['text'][:500]}" for wj in window_jobs]
+            for wj, contexts in zip(window_jobs, retrieve_many(queries)):
+                wj["contexts"] = contexts
+
+        partials = self.review_many(window_jobs, use_cache=use_cache)
+        results: List[LLMResult] = []
+        for idx in range(len(jobs)):
+            parts = [r for r, owner in zip(partials, owners) if owner == idx]
+            part_contexts = [wj["contexts"] for wj, owner in zip(window_jobs, owners) if owner == idx]
+            failed = [r for r in parts if r.error]
+            error = None
+            if failed:
+                error = f"{len(failed)} of {len(parts)} window(s) failed: {failed[0].error}"
+            results.append(LLMResult(
+                issues=merge_issues([r.issues for r in parts], part_contexts),
+                error=error,
+                attempts=sum(r.attempts for r in parts),
+                elapsed=max((r.elapsed for r in parts), default=0.0),
+                cached=all(r.cached for r in parts),
+            ))
+        return results
+
+    def analyze_document(self, text: str, doc_type: str, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self.review(text, doc_type, contexts).issues
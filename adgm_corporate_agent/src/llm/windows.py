@@ -0,0 +1,96 @@
+from __future__ import annotations
+import re
+from typing import Any, Dict, List
+
+CHARS_PER_TOKEN = 4  # rough English/legal-text average; avoids a tokenizer dependency
+HEADING_RE = re.compile(
+    r"^\s*((article|section|clause|part|schedule|chapter)\b|\d+(\.\d+)*[.)]?\s+[A-Z]|[A-Z][A-Z0-9 ,&'-]{3,}$)",
+    re.IGNORECASE,
+)
+SENTENCE_RE = re.compile(r"(?<=[.;:!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _split_long_paragraph(paragraph: str, max_chars: int) -> List[str]:
+    pieces: List[str] = []
+    current = ""
+    for sentence in SENTENCE_RE.split(paragraph):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_windows(text: str | List[str], max_tokens: int) -> List[str]:
+    """Split ``text`` into windows of at most ``max_tokens`` (estimated).
+
+    Windows break on paragraph boundaries, preferring to start a new window at
+    a section heading once the current one is half full; only paragraphs that
+    are longer than a window on their own are split further, by sentence.
+    ``text`` may also be the document's paragraph list.
+    """
+    max_chars = max(200, max_tokens * CHARS_PER_TOKEN)
+    windows: List[str] = []
+    current: List[str] = []
+    size = 0
+    paragraphs = text if isinstance(text, list) else (text or "").split("\n")
+    for paragraph in (p for p in paragraphs if p.strip()):
+        parts = [paragraph] if len(paragraph) <= max_chars else _split_long_paragraph(paragraph, max_chars)
+        for part in parts:
+            at_heading = bool(HEADING_RE.match(part)) and size >= max_chars // 2
+            if current and (size + len(part) + 1 > max_chars or at_heading):
+                windows.append("\n".join(current))
+                current, size = [], 0
+            current.append(part)
+            size += len(part) + 1
+    if current:
+        windows.append("\n".join(current))
+    return windows
+
+
+def _issue_key(issue: Dict[str, Any]) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", str(issue.get("issue", "")).lower()).strip()
+
+
+def _add_citations(issue: Dict[str, Any], contexts: List[Dict[str, Any]]) -> None:
+    citations = issue.setdefault("source_citations", [])
+    for context in contexts:
+        if context not in citations:
+            citations.append(context)
+
+
+def merge_issues(partials: List[List[Dict[str, Any]]], contexts: List[List[Dict[str, Any]]] | None = None) -> List[Dict[str, Any]]:
+    """Merge per-window issue lists, dropping duplicates of the same finding.
+
+    With ``contexts`` (one list per window) each issue cites, as
+    ``source_citations``, the references its window(s) were reviewed against.
+    """
+    merged: List[Dict[str, Any]] = []
+    by_key: Dict[str, Dict[str, Any]] = {}
+    for idx, issues in enumerate(partials):
+        for issue in issues:
+            key = _issue_key(issue)
+            if key and key in by_key:
+                if contexts is not None:
+                    _add_citations(by_key[key], contexts[idx])
+                continue
+            issue = dict(issue)
+            if contexts is not None:
+                issue["source_citations"] = []
+                _add_citations(issue, contexts[idx])
+            by_key[key] = issue
+            merged.append(issue)
+    return merged
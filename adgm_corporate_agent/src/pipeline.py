@@ -0,0 +1,302 @@
+from __future__ import annotations
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.config import AppConfig
+from src.review_cache import ReviewCache, make_review_key
+from src.utils.file_utils import StreamingZipWriter, file_sha256
+from src.utils.metrics import METRICS, maybe_profile, span
+from src.utils.time_utils import now_timestamp_ist
+from src.docx_tools.parser import DocumentModel, parse_docx
+from src.docx_tools.annotator import annotate_document
+from src.rules.checks import (
+    REQUIRED_INCORP_DOCS,
+    classify_document_type,
+    detect_red_flags_rule_based,
+    detect_process_by_content,
+    get_rule_engine,
+    rules_version,
+)
+
+STAGE_LABELS = {
+    "queued": "queued",
+    "parsing": "parsing and classifying",
+    "retrieving": "retrieving ADGM references",
+    "reviewing": "reviewing with LLM",
+    "annotating": "annotating",
+    "done": "done",
+}
+
+
+class ReviewCancelled(Exception):
+    pass
+
+
+@dataclass
+class DocumentReview:
+    path: str
+    doc_type: str
+    entry: Dict[str, Any]
+    reviewed_path: str
+    timing: Dict[str, Any] = field(default_factory=dict)
+    cached: bool = False
+
+
+@dataclass
+class ParsedDocument:
+    """Picklable output of the CPU-bound parse/classify/rules step."""
+
+    path: str
+    text: str
+    paragraphs: List[str]
+    doc_type: str
+    rule_issues: List[Dict[str, Any]]
+
+
+def analyze_model(model: DocumentModel, path: str) -> ParsedDocument:
+    doc_type = classify_document_type(model, filename=os.path.basename(path))
+    return ParsedDocument(
+        path=path,
+        text=model.text,
+        paragraphs=model.paragraph_texts,
+        doc_type=doc_type,
+        rule_issues=detect_red_flags_rule_based(model, doc_type),
+    )
+
+
+def analyze_file(path: str) -> ParsedDocument:
+    return analyze_model(parse_docx(path), path)
+
+
+def annotate_file(path: str, issues: List[Dict[str, Any]], output_path: str) -> bytes:
+    return annotate_document(parse_docx(path), issues, output_path)
+
+
+def _init_worker() -> None:
+    # Compile the rule set once per worker; it is read-only afterwards
+    get_rule_engine()
+
+
+def create_analysis_pool(workers: int) -> ProcessPoolExecutor | None:
+    """Process pool for parsing/rules and annotation, or None to run them in-process (``workers <= 1``)."""
+    if workers <= 1:
+        return None
+    # Never plain fork: the parent may already hold torch/Chroma threads
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(method),
+        initializer=_init_worker,
+    )
+
+
+def reviewed_name(path: str, outputs_dir: str) -> str:
+    base_name, ext = os.path.splitext(os.path.basename(path))
+    return os.path.join(outputs_dir, f"{base_name}_reviewed{ext}")
+
+
+def _stage(name: str, cancel: threading.Event | None, on_stage: Callable[[str], Any] | None) -> None:
+    if cancel is not None and cancel.is_set():
+        raise ReviewCancelled(name)
+    if on_stage is not None:
+        on_stage(name)
+
+
+def review_document(
+    services: Dict[str, Any],
+    path: str,
+    cancel: threading.Event | None = None,
+    on_stage: Callable[[str], Any] | None = None,
+    reviewed_path: str | None = None,
+    archive: StreamingZipWriter | None = None,
+) -> DocumentReview:
+    """Parse, classify, retrieve, review and annotate one uploaded document.
+
+    ``on_stage`` is called with each stage name as it starts; ``cancel`` is
+    checked between stages and raises ``ReviewCancelled`` once set. With an
+    ``analysis_pool`` the parse/rules and annotation steps run in worker
+    processes (the annotation worker re-opens the file, since python-docx
+    objects cannot cross processes); otherwise the file is parsed once here.
+    The reviewed file is added to ``archive`` as soon as it is written.
+
+    The stages are timed as a ``document`` span (returned in ``timing``);
+    reviews slower than ``PROFILE_SLOW_SECONDS`` leave a profile under
+    ``outputs/profiles``.
+
+    With a ``review_cache`` an unchanged document (same content, rule set,
+    index version and LLM settings) is served from the cache instead: its
+    stored reviewed file is written out and no stage runs. Reviews with an
+    LLM error are not cached.
+    """
+    config: AppConfig = services["config"]
+    cache: ReviewCache | None = services.get("review_cache")
+    name = os.path.basename(path)
+    profiles_dir = os.path.join(config.outputs_dir, "profiles")
+    if reviewed_path is None:
+        reviewed_path = reviewed_name(path, config.outputs_dir)
+    with span("document", file=name) as doc_span:
+        key = review_cache_key(services, path) if cache is not None else None
+        hit = cache.get(key) if cache is not None else None
+        if cache is not None:
+            METRICS.inc("adgm_review_cache_total", help_text="Whole-document review cache lookups.", result="hit" if hit else "miss")
+        if hit is not None:
+            review = _cached_review(hit, path, cancel, on_stage, reviewed_path, archive)
+        else:
+            with maybe_profile(name, config.profile_slow_seconds, config.profile_mode, profiles_dir):
+                review, data = _review_document(services, path, cancel, on_stage, reviewed_path, archive)
+            if cache is not None and "llm_error" not in review.entry:
+                cache.put(key, review.doc_type, review.entry, data)
+        doc_span.attrs["doc_type"] = review.doc_type
+        doc_span.attrs["cached"] = review.cached
+    review.timing = doc_span.to_dict()
+    METRICS.inc("adgm_documents_reviewed_total", help_text="Documents reviewed end to end.", doc_type=review.doc_type)
+    return review
+
+
+def review_cache_key(services: Dict[str, Any], path: str) -> str:
+    return make_review_key(
+        file_sha256(path),
+        os.path.basename(path),
+        rules_version(),
+        services["indexer"].index_key,
+        services["llm"].fingerprint,
+        services["config"].retrieval_mode,
+    )
+
+
+def _cached_review(
+    hit: Dict[str, Any],
+    path: str,
+    cancel: threading.Event | None,
+    on_stage: Callable[[str], Any] | None,
+    reviewed_path: str,
+    archive: StreamingZipWriter | None,
+) -> DocumentReview:
+    _stage("done", cancel, on_stage)
+    with open(reviewed_path, "wb") as f:
+        f.write(hit["reviewed"])
+    if archive is not None:
+        archive.add(archive.arcname_for(reviewed_path), hit["reviewed"])
+    entry = {**hit["entry"], "file_name": os.path.basename(path)}
+    return DocumentReview(path=path, doc_type=hit["doc_type"], entry=entry, reviewed_path=reviewed_path, cached=True)
+
+
+def _review_document(
+    services: Dict[str, Any],
+    path: str,
+    cancel: threading.Event | None,
+    on_stage: Callable[[str], Any] | None,
+    reviewed_path: str,
+    archive: StreamingZipWriter | None,
+) -> Tuple[DocumentReview, bytes]:
+    pool: ProcessPoolExecutor | None = services.get("analysis_pool")
+
+    _stage("parsing", cancel, on_stage)
+    model: DocumentModel | None = None
+    with span("parse"):
+        if pool is not None:
+            parsed = pool.submit(analyze_file, path).result()
+        else:
+            # One parse per upload, shared by classification, rules, LLM prompting and annotation
+            model = parse_docx(path)
+            parsed = analyze_model(model, path)
+    doc_type = parsed.doc_type
+
+    _stage("retrieving", cancel, on_stage)
+    retriever = services["retriever"]
+    with span("retrieve"):
+        contexts = retriever.retrieve(f"ADGM rules related to {doc_type}", top_k=5)
+
+    _stage("reviewing", cancel, on_stage)
+    with span("llm"):
+        llm_result = services["llm"].review_documents(
+            [{"text": parsed.text, "paragraphs": parsed.paragraphs, "doc_type": doc_type, "contexts": contexts}],
+            retrieve_many=lambda queries: retriever.retrieve_many(queries, top_k=5),
+        )[0]
+    help_text = "Issues reported, by source."
+    METRICS.inc("adgm_findings_total", len(parsed.rule_issues), help_text, source="rules")
+    METRICS.inc("adgm_findings_total", len(llm_result.issues), help_text, source="llm")
+
+    _stage("annotating", cancel, on_stage)
+    merged_issues: List[Dict[str, Any]] = []
+    for issue in parsed.rule_issues + llm_result.issues:
+        issue = dict(issue)
+        # LLM findings cite the references their window was reviewed against; rule findings the document-level lookup
+        issue.setdefault("source_citations", contexts)
+        issue.setdefault("document", doc_type)
+        merged_issues.append(issue)
+
+    with span("annotate", issues=len(merged_issues)):
+        if model is not None:
+            data = annotate_document(model, merged_issues, reviewed_path)
+        else:
+            data = pool.submit(annotate_file, path, merged_issues, reviewed_path).result()
+        if archive is not None:
+            archive.add(archive.arcname_for(reviewed_path), data)
+
+    entry: Dict[str, Any] = {
+        "file_name": os.path.basename(path),
+        "document_type": doc_type,
+        "issues_found": merged_issues,
+    }
+    if llm_result.error:
+        entry["llm_error"] = llm_result.error
+    _stage("done", None, on_stage)
+    return DocumentReview(path=path, doc_type=doc_type, entry=entry, reviewed_path=reviewed_path), data
+
+
+def citation_id(citation: Dict[str, Any]) -> str:
+    payload = f"{citation.get('source')}\0{citation.get('snippet')}"
+    return "cit_" + hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def compact_entry(entry: Dict[str, Any], citations: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Copy of ``entry`` whose issues reference citation ids; the citations go into ``citations`` once."""
+    issues = []
+    for issue in entry.get("issues_found", []):
+        ids = []
+        for citation in issue.get("source_citations") or []:
+            cid = citation_id(citation)
+            citations.setdefault(cid, citation)
+            ids.append(cid)
+        issues.append({**issue, "source_citations": ids})
+    return {**entry, "issues_found": issues}
+
+
+def build_summary(
+    reviews: List[DocumentReview],
+    documents_uploaded: int,
+    timestamp: str | None = None,
+    compact: bool = False,
+) -> Dict[str, Any]:
+    """Consolidated report; with ``compact`` each citation is stored once under ``citations``
+    and issues list citation ids instead of repeating the snippets."""
+    document_analysis = [r.entry for r in reviews]
+    present_required_docs = {r.doc_type for r in reviews if r.doc_type in REQUIRED_INCORP_DOCS}
+    required_set = set(REQUIRED_INCORP_DOCS)
+    summary = {
+        "timestamp": timestamp or now_timestamp_ist(),
+        "process": detect_process_by_content(document_analysis),
+        "documents_uploaded": documents_uploaded,
+        "required_documents": len(required_set),
+        "missing_documents": sorted(list(required_set - present_required_docs)),
+        "document_analysis": document_analysis,
+    }
+    if compact:
+        citations: Dict[str, Dict[str, Any]] = {}
+        summary["document_analysis"] = [compact_entry(e, citations) for e in document_analysis]
+        summary["citations"] = citations
+    return summary
+
+
+def output_paths(config: AppConfig, timestamp: str) -> Dict[str, str]:
+    stamp = timestamp.replace(':', '-')
+    return {
+        "json": os.path.join(config.outputs_dir, f"summary_{stamp}.json"),
+        "zip": os.path.join(config.outputs_dir, f"reviewed_docs_{stamp}.zip"),
+    }
@@ -1,23 +1,97 @@
 from __future__ import annotations
-from typing import List
+import os
+import platform
+import re
+from typing import Any, Dict, List
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
 
 from src.config import AppConfig
 
+EMBEDDINGS_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Dynamic int8 exports, named as sentence-transformers (and most model repos) name them
+INT8_QUANTIZATION = {"arm64": "onnx/model_qint8_arm64.onnx", "avx2": "onnx/model_quint8_avx2.onnx"}
+
+
+def int8_flavour() -> str:
+    return "arm64" if platform.machine().lower() in ("arm64", "aarch64") else "avx2"
+
+
+def _has_file(name: str, file_name: str) -> bool:
+    """Whether a local model directory or Hub repository (cached or online) contains ``file_name``."""
+    if os.path.isdir(name):
+        return os.path.exists(os.path.join(name, file_name))
+    try:
+        from huggingface_hub import file_exists, try_to_load_from_cache
+        return isinstance(try_to_load_from_cache(name, file_name), str) or file_exists(name, file_name)
+    except Exception:
+        return False
+
 
 class EmbeddingsModel:
+    """SentenceTransformer encoder on CPU with a selectable inference backend.
+
+    ``torch`` runs the model as published; ``onnx`` runs its ONNX export under
+    ONNX Runtime; ``onnx-int8`` runs a dynamically quantised int8 export. ONNX
+    files are taken from the model repository when it ships them and otherwise
+    exported once into ``cache/onnx``. The ONNX backends need
+    ``optimum[onnxruntime]``.
+    """
+
     def __init__(self, config: AppConfig):
+        if config.embeddings_provider != "hf":
+            raise ValueError(f"Unsupported EMBEDDINGS_PROVIDER {config.embeddings_provider!r}; only 'hf' is available")
+        if config.embeddings_backend not in EMBEDDINGS_BACKENDS:
+            raise ValueError(f"Unknown EMBEDDINGS_BACKEND {config.embeddings_backend!r}; expected one of {', '.join(EMBEDDINGS_BACKENDS)}")
         self.config = config
-        if config.embeddings_provider == "hf":
-            self.model = SentenceTransformer(config.embeddings_model)
-            self.dim = self.model.get_sentence_embedding_dimension()
-        else:
-            # Fallback to HF for this POC
-            self.model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-            self.dim = self.model.get_sentence_embedding_dimension()
+        self.backend = config.embeddings_backend
+        self.batch_size = max(1, config.embeddings_batch_size)
+        # Index manifests record this so a model or backend switch re-embeds everything
+        self.identity = f"{config.embeddings_model}|{self.backend}"
+        self.model = self._load_torch() if self.backend == "torch" else self._load_onnx(self.backend == "onnx-int8")
+        dimension = getattr(self.model, "get_embedding_dimension", None) or self.model.get_sentence_embedding_dimension
+        self.dim = dimension()
+
+    def _load_torch(self):
+        # Imported here: sentence_transformers pulls in torch, which dominates start-up
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if self.config.embeddings_threads > 0:
+            torch.set_num_threads(self.config.embeddings_threads)  # process-wide
+        return SentenceTransformer(self.config.embeddings_model, device="cpu")
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
-        return [vec.tolist() for vec in self.model.encode(texts, convert_to_tensor=True)]
+    def _onnx_kwargs(self) -> Dict[str, Any]:
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if self.config.embeddings_threads > 0:
+            options.intra_op_num_threads = self.config.embeddings_threads
+        return {"provider": "CPUExecutionProvider", "session_options": options}
 
+    def _load_onnx(self, quantized: bool):
+        # sentence-transformers only reports a missing optimum as a bare Exception mid-load
+        try:
+            import onnxruntime  # noqa: F401
+            import optimum.onnxruntime  # noqa: F401
+        except ImportError as e:
+            raise ImportError(f'EMBEDDINGS_BACKEND={self.backend} needs ONNX Runtime and Optimum: pip install "optimum[onnxruntime]"') from e
+        from sentence_transformers import SentenceTransformer
+        name = self.config.embeddings_model
+        flavour = int8_flavour()
+        file_name = INT8_QUANTIZATION[flavour] if quantized else "onnx/model.onnx"
+        # Checked up front: given a missing file, sentence-transformers re-exports fp32 on every load
+        if not _has_file(name, file_name):
+            local_dir = os.path.join(self.config.cache_dir, "onnx", re.sub(r"[^\w.-]+", "_", name))
+            if not os.path.exists(os.path.join(local_dir, file_name)):
+                fp32 = SentenceTransformer(name, device="cpu", backend="onnx", model_kwargs=self._onnx_kwargs())
+                fp32.save(local_dir)
+                if quantized:
+                    from sentence_transformers import export_dynamic_quantized_onnx_model
+                    export_dynamic_quantized_onnx_model(fp32, flavour, local_dir)
+            name = local_dir
+        return SentenceTransformer(name, device="cpu", backend="onnx", model_kwargs={**self._onnx_kwargs(), "file_name": file_name})
 
+    def embed(self, texts: List[str]) -> np.ndarray:
+        # One C-contiguous float32 matrix (rows = texts), whatever the backend returns
+        vectors = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False)
+        return np.ascontiguousarray(vectors, dtype=np.float32)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import multiprocessing
+import queue
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple
+
+
+@dataclass
+class ExtractionResult:
+    path: str
+    text: str
+    error: str | None = None
+    elapsed: float = 0.0
+
+    def as_error_dict(self) -> Dict[str, object]:
+        return {"path": self.path, "error": self.error, "elapsed": round(self.elapsed, 3)}
+
+
+def docx_text(source) -> str:
+    from docx import Document
+    d = Document(source)
+    paras = [p.text for p in d.paragraphs]
+    for table in d.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                paras.append(cell.text)
+    return "\n".join([t for t in paras if t and t.strip()])
+
+
+def pdf_text(source) -> str:
+    from pdfminer.high_level import extract_text
+    return extract_text(source)
+
+
+def extract_reference_text(path: str) -> str:
+    low = path.lower()
+    if low.endswith((".txt", ".md")):
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
+    if low.endswith(".pdf"):
+        return pdf_text(path)
+    if low.endswith(".docx"):
+        return docx_text(path)
+    return ""
+
+
+def extract_safe(path: str) -> ExtractionResult:
+    # Runs inside pool workers: never raise, so every file produces a result
+    start = time.perf_counter()
+    try:
+        text = extract_reference_text(path)
+        return ExtractionResult(path=path, text=text, elapsed=time.perf_counter() - start)
+    except Exception as e:
+        return ExtractionResult(path=path, text="", error=f"{type(e).__name__}: {e}"[:500], elapsed=time.perf_counter() - start)
+
+
+def iter_extractions(paths: List[str], workers: int, timeout: float) -> Iterator[ExtractionResult]:
+    """Extract ``paths`` on a process pool, yielding each result as soon as it finishes.
+
+    Results arrive in completion order. A file still running after ``timeout``
+    seconds is reported as an error; the pool is then recycled (hung workers
+    cannot be cancelled individually) and the other in-flight files resubmitted.
+    Plain-text files are read inline; PDF/DOCX always go through the pool (of
+    at least one process) so the timeout holds for a single file as well.
+    """
+    heavy: List[str] = []
+    for path in paths:
+        if path.lower().endswith((".txt", ".md")):
+            yield extract_safe(path)
+        else:
+            heavy.append(path)
+    if not heavy:
+        return
+    workers = max(1, min(workers, len(heavy)))
+
+    # Never plain fork: forking a parent that already holds torch/Chroma threads can deadlock
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    ctx = multiprocessing.get_context(method)
+    done: "queue.Queue[ExtractionResult]" = queue.Queue()
+    todo = deque(heavy)
+    in_flight: Dict[str, float] = {}
+    pool = ctx.Pool(processes=workers)
+
+    def submit(path: str) -> None:
+        in_flight[path] = time.monotonic() + timeout
+        pool.apply_async(extract_safe, (path,), callback=done.put)
+
+    try:
+        while todo or in_flight:
+            while todo and len(in_flight) < workers:
+                submit(todo.popleft())
+            wait = max(0.0, min(in_flight.values()) - time.monotonic())
+            try:
+                result = done.get(timeout=wait)
+            except queue.Empty:
+                result = None
+            if result is not None:
+                # Results from a recycled pool may still trickle in; only report live submissions
+                if in_flight.pop(result.path, None) is not None:
+                    yield result
+                continue
+            now = time.monotonic()
+            expired: List[Tuple[str, float]] = [(p, d) for p, d in in_flight.items() if d <= now]
+            if not expired:
+                continue
+            pool.terminate()
+            pool = ctx.Pool(processes=workers)
+            for path, _ in expired:
+                del in_flight[path]
+                yield ExtractionResult(path=path, text="", error=f"Timeout: extraction exceeded {timeout:g}s", elapsed=timeout)
+            for path in list(in_flight):
+                submit(path)
+    finally:
+        pool.terminate()
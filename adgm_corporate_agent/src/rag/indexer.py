@@ -1,121 +1,322 @@
 from __future__ import annotations
+import hashlib
+import json
 import os
-from typing import List, Tuple
-
-import chromadb
-from chromadb.utils import embedding_functions
+import threading
+import time
+import uuid
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
 
 from src.config import AppConfig
 from src.rag.embeddings import EmbeddingsModel
+from src.rag.extraction import iter_extractions
+from src.rag.fetcher import URLFetcher
+from src.rag.lexical import BM25_NAME, BM25Index
+from src.rag.vectorstore import VectorStore, create_vector_store
+from src.utils.file_utils import file_sha256
+from src.utils.metrics import METRICS
+
+CHUNK_SIZE = 1200
+MANIFEST_NAME = "reference_manifest.json"
+SUPPORTED_EXTS = (".txt", ".md", ".pdf", ".docx")
+# Each checkpoint rewrites the stores' files, so mid-build checkpoints are spaced out in time
+CHECKPOINT_SECONDS = 30.0
+
+
+def chunk_text(content: str, size: int = CHUNK_SIZE) -> List[str]:
+    return [content[i : i + size] for i in range(0, len(content), size)]
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def chunk_id(source: str, position: int, chunk: str) -> str:
+    # Stable across runs: the same chunk of the same source always maps to the same id
+    digest = hashlib.sha1(f"{source}\0{position}\0{chunk}".encode("utf-8", "ignore")).hexdigest()
+    return f"ref_{digest[:24]}"
 
 
 class RAGIndexer:
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, store: VectorStore | None = None, emb_model: EmbeddingsModel | None = None, lexical: BM25Index | None = None):
         self.config = config
-        self.client = chromadb.PersistentClient(path=config.vectorstore_dir)
-        self.collection_name = "adgm_reference"
-        self.emb_model = EmbeddingsModel(config)
-
-    def _get_collection(self):
-        # Create or get
-        return self.client.get_or_create_collection(
-            name=self.collection_name,
-            metadata={"hnsw:space": "cosine"},
-        )
+        # Shared store/model are passed in by the service registry; standalone use builds its own.
+        # The BM25 index is always maintained; dense vectors are skipped in lexical-only mode.
+        self.dense = config.retrieval_mode != "lexical"
+        self.store = None
+        self.emb_model = None
+        if self.dense:
+            self.store = store if store is not None else create_vector_store(config)
+            self.emb_model = emb_model if emb_model is not None else EmbeddingsModel(config)
+        self.lexical = lexical if lexical is not None else BM25Index(os.path.join(config.vectorstore_dir, BM25_NAME))
+        self.manifest_path = os.path.join(config.vectorstore_dir, MANIFEST_NAME)
+        self.url_cache_dir = os.path.join(config.vectorstore_dir, "url_cache")
+        self.extraction_errors: List[Dict[str, Any]] = []
+        self.fetch_errors: List[Dict[str, Any]] = []
+        # Bumped whenever the store changes; caches key on it (see RAGRetriever)
+        state = self._read_index_state()
+        self.index_version = int(state.get("index_version", 0))
+        # Regenerated whenever the store is reset, so a wiped and rebuilt index never looks unchanged
+        self.index_id = state.get("index_id") or uuid.uuid4().hex
+        self._listeners: List[Callable[[int], None]] = []
+        # The background warm-up and a request may both sync the index
+        self._build_lock = threading.Lock()
+
+    def add_change_listener(self, callback: Callable[[int], None]) -> None:
+        self._listeners.append(callback)
+
+    def _read_index_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    @property
+    def index_key(self) -> str:
+        """Identifies the current index contents across resets; for caches that outlive the store."""
+        return f"{self.index_id}:{self.index_version}"
+
+    def _bump_index_version(self) -> None:
+        self.index_version += 1
+        for callback in self._listeners:
+            callback(self.index_version)
+
+    def _targets(self) -> List[Any]:
+        return [t for t in (self.store, self.lexical) if t is not None]
+
+    def _backend_tag(self) -> str:
+        return "+".join(t.name for t in self._targets())
+
+    def _delete_chunks(self, ids: List[str]) -> None:
+        for target in self._targets():
+            target.delete(ids)
 
-    def build_or_rebuild(self, force_rebuild: bool = False) -> str:
-        collection = self._get_collection()
-        if force_rebuild:
-            try:
-                self.client.delete_collection(self.collection_name)
-            except Exception:
-                pass
-            collection = self._get_collection()
-
-        # If already has items, skip
-        count = collection.count()
-        if count > 0 and not force_rebuild:
-            return f"Index ready (existing {count} items)."
-
-        # Load reference files and URLs
-        texts: List[str] = []
-        sources: List[str] = []
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]] | None:
+        if not os.path.exists(self.manifest_path):
+            return None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return None
+        # A manifest written for another backend set does not describe these stores
+        if data.get("backend", "chroma") != self._backend_tag():
+            return None
+        # Nor do vectors from another embedding model or inference backend (older manifests: torch)
+        if self.emb_model is not None and data.get("embeddings", f"{self.config.embeddings_model}|torch") != self.emb_model.identity:
+            return None
+        return data.get("sources", {})
+
+    def _save_manifest(self, sources: Dict[str, Dict[str, Any]]) -> None:
+        # Persist vectors and postings before the manifest claims them
+        for target in self._targets():
+            target.flush()
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": 1,
+                "backend": self._backend_tag(),
+                "embeddings": self.emb_model.identity if self.emb_model is not None else None,
+                "index_version": self.index_version,
+                "index_id": self.index_id,
+                "sources": sources,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _list_reference_files(self) -> List[str]:
+        paths: List[str] = []
         for root, _, files in os.walk(self.config.data_reference_dir):
             for fname in files:
-                path = os.path.join(root, fname)
-                low = fname.lower()
-                if low.endswith((".txt", ".md")):
-                    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
-                    for i in range(0, len(content), 1200):
-                        chunk = content[i : i + 1200]
-                        texts.append(chunk)
-                        sources.append(path)
-                elif low.endswith(".pdf"):
-                    try:
-                        from pdfminer.high_level import extract_text
-                        content = extract_text(path)
-                        for i in range(0, len(content), 1200):
-                            chunk = content[i : i + 1200]
-                            texts.append(chunk)
-                            sources.append(path)
-                    except Exception:
-                        pass
-                elif low.endswith((".docx",)):
-                    try:
-                        from docx import Document
-                        from itertools import chain
-                        d = Document(path)
-                        paras = [p.text for p in d.paragraphs]
-                        for table in d.tables:
-                            for row in table.rows:
-                                for cell in row.cells:
-                                    paras.append(cell.text)
-                        content = "\n".join([t for t in paras if t and t.strip()])
-                        for i in range(0, len(content), 1200):
-                            chunk = content[i : i + 1200]
-                            texts.append(chunk)
-                            sources.append(path)
-                    except Exception:
-                        pass
-
-        # Also fetch URLs listed in sources_urls.txt if present
+                if fname.lower().endswith(SUPPORTED_EXTS):
+                    paths.append(os.path.join(root, fname))
+        return sorted(paths)
+
+    def _read_urls(self) -> List[str]:
         urls_file = os.path.join(self.config.data_reference_dir, "sources_urls.txt")
-        if os.path.exists(urls_file):
-            try:
-                import requests
-                from bs4 import BeautifulSoup
-                with open(urls_file, "r", encoding="utf-8", errors="ignore") as f:
-                    urls = [u.strip() for u in f.read().splitlines() if u.strip() and not u.strip().startswith("#")]
-                for url in urls:
-                    try:
-                        r = requests.get(url, timeout=20)
-                        r.raise_for_status()
-                        if url.lower().endswith((".pdf",)):
-                            # best-effort: skip binary fetch of large PDFs here (user can pre-download); or store URL as source only
-                            texts.append(f"Referenced PDF at {url}")
-                            sources.append(url)
-                        elif url.lower().endswith((".docx",)):
-                            texts.append(f"Referenced DOCX template at {url}")
-                            sources.append(url)
-                        else:
-                            soup = BeautifulSoup(r.text, "html.parser")
-                            text = soup.get_text(" ")
-                            for i in range(0, len(text), 1200):
-                                chunk = text[i : i + 1200]
-                                texts.append(chunk)
-                                sources.append(url)
-                    except Exception:
-                        continue
-            except Exception:
-                pass
-
-        if not texts:
-            return "No reference files found. Add files to data/reference/."
-
-        embeddings = self.emb_model.embed(texts)
-        ids = [f"ref_{i}" for i in range(len(texts))]
-        collection.upsert(ids=ids, documents=texts, metadatas=[{"source": s} for s in sources], embeddings=embeddings)
-        return f"Index built with {len(texts)} chunks."
+        if not os.path.exists(urls_file):
+            return []
+        with open(urls_file, "r", encoding="utf-8", errors="ignore") as f:
+            return [u.strip() for u in f.read().splitlines() if u.strip() and not u.strip().startswith("#")]
+
+    def _iter_changed_sources(self, manifest: Dict[str, Dict[str, Any]], seen: set) -> Iterator[Tuple[str, Dict[str, Any], str]]:
+        """Yield ``(source, manifest_entry, content)`` for every new or changed source, one at a time.
+
+        Changed files are extracted on a process pool and yielded in completion
+        order; failures are collected in ``self.extraction_errors`` and recorded
+        in the manifest. A failed file is extracted again once it changes or
+        ``EXTRACT_RETRY_SECONDS`` have passed (a timeout may well be temporary);
+        until then it is still reported as failed.
+        """
+        changed: Dict[str, Dict[str, Any]] = {}
+        now = time.time()
+        for path in self._list_reference_files():
+            seen.add(path)
+            entry = manifest.get(path) or {}
+            failed = bool(entry.get("error"))
+            stat = os.stat(path)
+            if entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+                if not failed:
+                    continue
+                if now - entry.get("checked_at", 0) < self.config.extract_retry_seconds:
+                    self.extraction_errors.append({"path": path, "error": entry["error"]})
+                    continue
+            digest = file_sha256(path)
+            if not failed and entry.get("hash") == digest:
+                entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                continue
+            changed[path] = {"hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+        for result in iter_extractions(list(changed), self.config.extract_workers, self.config.extract_timeout):
+            entry = changed[result.path]
+            if result.error:
+                entry.update(error=result.error, checked_at=time.time())
+                self.extraction_errors.append(result.as_error_dict())
+            yield result.path, entry, result.text
+
+        # URLs are revalidated once they are older than URL_REFRESH_SECONDS (or on a forced
+        # rebuild); the fetcher's conditional-GET cache makes unchanged pages a cheap 304
+        now = time.time()
+        due: List[str] = []
+        for url in self._read_urls():
+            seen.add(url)
+            entry = manifest.get(url)
+            if entry is None or now - entry.get("checked_at", 0) >= self.config.url_refresh_seconds:
+                due.append(url)
+        if not due:
+            return
+        fetcher = URLFetcher(self.url_cache_dir, workers=self.config.fetch_workers, timeout=self.config.fetch_timeout)
+        try:
+            for result in fetcher.fetch_many(due):
+                entry = manifest.get(result.url)
+                if result.error:
+                    self.fetch_errors.append({"url": result.url, "error": result.error})
+                    if entry is None:
+                        manifest[result.url] = {"hash": None, "chunk_ids": [], "error": result.error, "checked_at": now}
+                    else:
+                        # Keep the last good chunks when a refresh fails
+                        entry.update(error=result.error, checked_at=now)
+                    continue
+                digest = hashlib.sha256(result.text.encode("utf-8", "ignore")).hexdigest()
+                if entry is not None and entry.get("hash") == digest:
+                    entry.pop("error", None)
+                    entry["checked_at"] = now
+                    continue
+                yield result.url, {"hash": digest, "checked_at": now}, result.text
+        finally:
+            fetcher.close()
+
+    def _iter_chunks(self, sources: Iterable[Tuple[str, Dict[str, Any], str]], manifest: Dict[str, Dict[str, Any]], pending: Dict[str, List[Any]], stats: Dict[str, int]) -> Iterator[Tuple[str, str, str]]:
+        """Chunk each source and yield ``(source, chunk_id, chunk)``.
 
+        A source is committed to the manifest only once all of its chunks have
+        been upserted (tracked in ``pending``), so an interrupted build resumes
+        from the first incomplete source.
+        """
+        for source, entry, content in sources:
+            chunks = [c for c in chunk_text(content) if c.strip()]
+            ids = [chunk_id(source, i, c) for i, c in enumerate(chunks)]
+            old_ids = (manifest.get(source) or {}).get("chunk_ids") or []
+            stale = sorted(set(old_ids) - set(ids))
+            if stale:
+                self._delete_chunks(stale)
+                stats["chunks_deleted"] += len(stale)
+            entry["chunk_ids"] = ids
+            if not chunks:
+                manifest[source] = entry
+                continue
+            pending[source] = [len(chunks), entry]
+            for cid, chunk in zip(ids, chunks):
+                yield source, cid, chunk
 
+    def build_or_rebuild(self, force_rebuild: bool = False, progress: Callable[[Dict[str, int]], None] | None = None) -> str:
+        """Bring the index in line with ``data/reference``.
+
+        Incremental by default: a manifest of source -> content hash -> chunk ids
+        decides which files need re-embedding and which chunks belong to files that
+        no longer exist. ``force_rebuild`` wipes the store and re-indexes
+        everything, revalidating every URL.
+
+        Sources stream through extract -> chunk -> embed -> upsert (vector store
+        and BM25 index) in batches of ``config.index_batch_size`` chunks, so memory
+        stays bounded by one source plus one batch. ``progress`` receives running
+        counters after every batch. Completed sources are checkpointed to the
+        manifest at most every ``CHECKPOINT_SECONDS`` and once at the end.
+        Concurrent calls run one after the other.
+        """
+        with self._build_lock:
+            return self._build_or_rebuild(force_rebuild, progress)
+
+    def _build_or_rebuild(self, force_rebuild: bool, progress: Callable[[Dict[str, int]], None] | None) -> str:
+        manifest = None if force_rebuild else self._load_manifest()
+        reset = manifest is None or (self.lexical.count() == 0 and bool(manifest))
+        if reset:
+            # Forced, first build, backend change, or an index predating the manifest: start clean
+            for target in self._targets():
+                target.reset()
+            self.index_id = uuid.uuid4().hex
+            manifest = {}
+            self._save_manifest(manifest)
+
+        self.extraction_errors = []
+        self.fetch_errors = []
+        seen: set = set()
+        pending: Dict[str, List[Any]] = {}
+        stats = {"sources_indexed": 0, "chunks_indexed": 0, "chunks_deleted": 0, "batches": 0}
+        removed: List[str] = []
+        last_checkpoint = time.monotonic()
+        try:
+            chunks = self._iter_chunks(self._iter_changed_sources(manifest, seen), manifest, pending, stats)
+            for batch in batched(chunks, max(1, self.config.index_batch_size)):
+                ids = [cid for _, cid, _ in batch]
+                texts = [chunk for _, _, chunk in batch]
+                metadatas = [{"source": source} for source, _, _ in batch]
+                if self.store is not None:
+                    self.store.upsert(ids=ids, documents=texts, metadatas=metadatas, embeddings=self.emb_model.embed(texts))
+                self.lexical.upsert(ids, texts, metadatas)
+                completed = False
+                for source, _, _ in batch:
+                    pending[source][0] -= 1
+                    if pending[source][0] == 0:
+                        manifest[source] = pending.pop(source)[1]
+                        stats["sources_indexed"] += 1
+                        completed = True
+                if completed and time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS:
+                    self._save_manifest(manifest)
+                    last_checkpoint = time.monotonic()
+                stats["chunks_indexed"] += len(batch)
+                METRICS.inc("adgm_index_chunks_total", len(batch), "Reference chunks embedded and indexed.")
+                stats["batches"] += 1
+                if progress is not None:
+                    progress(dict(stats))
+
+            removed = [src for src in manifest if src not in seen]
+            for src in removed:
+                stale_ids = manifest.pop(src).get("chunk_ids") or []
+                if stale_ids:
+                    self._delete_chunks(stale_ids)
+                    stats["chunks_deleted"] += len(stale_ids)
+        finally:
+            # Also on interruption: a partially applied build still invalidates cached retrievals
+            if reset or stats["chunks_indexed"] or stats["chunks_deleted"]:
+                self._bump_index_version()
+            self._save_manifest(manifest)
+
+        count = self.lexical.count()
+        failed = f" {len(self.extraction_errors)} file(s) failed to extract." if self.extraction_errors else ""
+        if self.fetch_errors:
+            failed += f" {len(self.fetch_errors)} URL(s) could not be fetched."
+        if count == 0:
+            return f"No reference files found. Add files to data/reference/.{failed}"
+        if not stats["chunks_indexed"] and not removed:
+            return f"Index ready (existing {count} items).{failed}"
+        return (
+            f"Index updated: {stats['sources_indexed']} new/changed and {len(removed)} removed source(s), "
+            f"{stats['chunks_indexed']} chunks indexed, {count} chunks total.{failed}"
+        )
@@ -0,0 +1,130 @@
+from __future__ import annotations
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+BM25_NAME = "bm25_index.json"
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("a an and are as at be by for from in is it of on or that the this to with".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Persisted Okapi BM25 index over the same chunks as the vector store.
+
+    Each chunk keeps its source, a display snippet, its length and term
+    frequencies; postings and document frequencies are rebuilt in memory on
+    load or after a change. Writes are buffered until ``flush``.
+    """
+
+    name = "bm25"
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._docs: Dict[str, List[Any]] = {}
+        self._postings: Dict[str, List[Tuple[str, int]]] | None = None
+        self._avgdl = 0.0
+        self._loaded_mtime: int | None = None
+        self._load()
+
+    def _load(self) -> None:
+        self._docs = {}
+        self._loaded_mtime = None
+        if os.path.exists(self.path):
+            mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._docs = json.load(f).get("docs", {})
+            self._loaded_mtime = mtime
+        self._postings = None
+
+    def _maybe_reload(self) -> None:
+        if not self._dirty and os.path.exists(self.path) and os.stat(self.path).st_mtime_ns != self._loaded_mtime:
+            self._load()
+
+    def _ensure_postings(self) -> Dict[str, List[Tuple[str, int]]]:
+        if self._postings is None:
+            postings: Dict[str, List[Tuple[str, int]]] = {}
+            total = 0
+            for cid, (_, _, length, tf) in self._docs.items():
+                total += length
+                for term, count in tf.items():
+                    postings.setdefault(term, []).append((cid, count))
+            self._avgdl = total / len(self._docs) if self._docs else 0.0
+            self._postings = postings
+        return self._postings
+
+    def count(self) -> int:
+        with self._lock:
+            self._maybe_reload()
+            return len(self._docs)
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._maybe_reload()
+            for cid, doc, meta in zip(ids, documents, metadatas):
+                tokens = tokenize(doc)
+                self._docs[cid] = [(meta or {}).get("source"), doc[:300], len(tokens), dict(Counter(tokens))]
+            self._postings = None
+            self._dirty = True
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            self._maybe_reload()
+            for cid in ids:
+                self._docs.pop(cid, None)
+            self._postings = None
+            self._dirty = True
+
+    def reset(self) -> None:
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._load()
+            self._dirty = False
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"docs": self._docs}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            self._loaded_mtime = os.stat(self.path).st_mtime_ns
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        with self._lock:
+            self._maybe_reload()
+            postings = self._ensure_postings()
+            docs, avgdl = self._docs, self._avgdl or 1.0
+            n_docs = len(docs)
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                plist = postings.get(term)
+                if not plist:
+                    continue
+                idf = math.log(1.0 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+                for cid, tf in plist:
+                    norm = self.k1 * (1.0 - self.b + self.b * docs[cid][2] / avgdl)
+                    scores[cid] = scores.get(cid, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda kv: kv[1])
+
+    def get(self, cid: str) -> Tuple[str, Dict[str, Any]] | None:
+        with self._lock:
+            doc = self._docs.get(cid)
+        if doc is None:
+            return None
+        return doc[1], {"source": doc[0]}
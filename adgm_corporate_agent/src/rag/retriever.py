@@ -1,30 +1,137 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+import os
+from typing import List, Dict, Any, Tuple
 
-import chromadb
+import numpy as np
 
 from src.config import AppConfig
 from src.rag.embeddings import EmbeddingsModel
+from src.rag.lexical import BM25_NAME, BM25Index
+from src.rag.vectorstore import VectorStore, create_vector_store
+from src.utils.cache_utils import TTLLRUCache
+from src.utils.metrics import METRICS
+
+
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+RRF_K = 60  # reciprocal-rank fusion damping constant
+HYBRID_CANDIDATES = 4  # each ranker contributes top_k * this many candidates to the fusion
 
 
 class RAGRetriever:
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, store: VectorStore | None = None, emb_model: EmbeddingsModel | None = None, index_version: int = 0, lexical: BM25Index | None = None):
         self.config = config
-        self.client = chromadb.PersistentClient(path=config.vectorstore_dir)
-        self.collection = self.client.get_or_create_collection("adgm_reference")
-        self.emb_model = EmbeddingsModel(config)
+        self.mode = config.retrieval_mode
+        if self.mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unsupported RETRIEVAL_MODE: {self.mode!r} (expected one of {', '.join(RETRIEVAL_MODES)})")
+        # Lexical-only retrieval never loads the embedding model or the vector store
+        self.store = None
+        self.emb_model = None
+        if self.mode != "lexical":
+            self.store = store if store is not None else create_vector_store(config)
+            self.emb_model = emb_model if emb_model is not None else EmbeddingsModel(config)
+        self.lexical = None
+        if self.mode != "dense":
+            self.lexical = lexical if lexical is not None else BM25Index(os.path.join(config.vectorstore_dir, BM25_NAME))
+        # Query embeddings never go stale; results are keyed on the index version as well
+        self.index_version = index_version
+        self.embedding_cache = TTLLRUCache(config.retrieval_cache_size, config.retrieval_cache_ttl)
+        self.result_cache = TTLLRUCache(config.retrieval_cache_size, config.retrieval_cache_ttl)
 
-    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        query_emb = self.emb_model.embed([query])[0]
-        res = self.collection.query(query_embeddings=[query_emb], n_results=top_k)
+    def set_index_version(self, index_version: int) -> None:
+        # Registered as an indexer change listener
+        self.index_version = index_version
+        self.result_cache.clear()
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return {"embeddings": self.embedding_cache.stats(), "results": self.result_cache.stats()}
+
+    def _format_results(self, hits: List[Tuple[str, str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
         results: List[Dict[str, Any]] = []
-        docs = res.get("documents", [[]])[0]
-        metas = res.get("metadatas", [[]])[0]
-        for doc, meta in zip(docs, metas):
+        for _, doc, meta in hits:
             results.append({
                 "snippet": doc[:300],
                 "source": (meta or {}).get("source"),
             })
         return results
 
+    def _dense_hits(self, queries: List[str], n_results: int) -> List[List[Tuple[str, str, Dict[str, Any]]]]:
+        embeddings: Dict[str, Any] = {}
+        to_embed = []
+        for query in queries:
+            query_emb = self.embedding_cache.get(query)
+            if query_emb is None:
+                to_embed.append(query)
+            else:
+                embeddings[query] = query_emb
+        if to_embed:
+            for query, query_emb in zip(to_embed, self.emb_model.embed(to_embed)):
+                self.embedding_cache.set(query, query_emb)
+                embeddings[query] = query_emb
+        res = self.store.query(np.stack([embeddings[q] for q in queries]), n_results=n_results)
+        all_ids = res.get("ids") or [[] for _ in queries]
+        all_docs = res.get("documents") or [[] for _ in queries]
+        all_metas = res.get("metadatas") or [[] for _ in queries]
+        return [list(zip(ids, docs, metas)) for ids, docs, metas in zip(all_ids, all_docs, all_metas)]
+
+    def _lexical_hits(self, query: str, n_results: int) -> List[Tuple[str, str, Dict[str, Any]]]:
+        hits: List[Tuple[str, str, Dict[str, Any]]] = []
+        for cid, _ in self.lexical.search(query, n_results):
+            found = self.lexical.get(cid)
+            if found is not None:
+                hits.append((cid, found[0], found[1]))
+        return hits
+
+    @staticmethod
+    def _fuse(rankings: List[List[Tuple[str, str, Dict[str, Any]]]], top_k: int) -> List[Tuple[str, str, Dict[str, Any]]]:
+        # Reciprocal-rank fusion: robust to the incomparable score scales of BM25 and cosine
+        scores: Dict[str, float] = {}
+        items: Dict[str, Tuple[str, str, Dict[str, Any]]] = {}
+        for ranking in rankings:
+            for rank, hit in enumerate(ranking):
+                scores[hit[0]] = scores.get(hit[0], 0.0) + 1.0 / (RRF_K + rank + 1)
+                items.setdefault(hit[0], hit)
+        best = sorted(scores, key=lambda cid: scores[cid], reverse=True)[:top_k]
+        return [items[cid] for cid in best]
+
+    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        return self.retrieve_many([query], top_k=top_k)[0]
+
+    def retrieve_many(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Retrieve contexts for several queries in one round trip.
+
+        Duplicate and cached queries are resolved without touching the model;
+        for dense/hybrid the remaining ones are embedded in a single batch and
+        sent to the vector store as one multi-embedding query. Hybrid mode fuses
+        the dense and BM25 rankings with reciprocal-rank fusion. Results are
+        returned in input order.
+        """
+        version = self.index_version
+        resolved: Dict[str, List[Dict[str, Any]]] = {}
+        missing: List[str] = []
+        for query in dict.fromkeys(queries):
+            cached = self.result_cache.get((query, top_k, version))
+            if cached is not None:
+                resolved[query] = cached
+            else:
+                missing.append(query)
+        METRICS.inc("adgm_retrieval_cache_hits_total", len(resolved), "Retrieval queries served from the result cache.")
+        METRICS.inc("adgm_retrieval_cache_misses_total", len(missing), "Retrieval queries sent to the index.")
+
+        if missing:
+            if self.mode == "lexical":
+                ranked = [self._lexical_hits(q, top_k) for q in missing]
+            elif self.mode == "dense":
+                ranked = self._dense_hits(missing, top_k)
+            else:
+                n_candidates = top_k * HYBRID_CANDIDATES
+                dense = self._dense_hits(missing, n_candidates)
+                ranked = [
+                    self._fuse([dense_hits, self._lexical_hits(q, n_candidates)], top_k)
+                    for q, dense_hits in zip(missing, dense)
+                ]
+            for query, hits in zip(missing, ranked):
+                results = self._format_results(hits)
+                self.result_cache.set((query, top_k, version), results)
+                resolved[query] = results
 
+        return [[dict(r) for r in resolved[query]] for query in queries]
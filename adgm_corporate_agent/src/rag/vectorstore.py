@@ -0,0 +1,231 @@
+from __future__ import annotations
+import json
+import os
+import threading
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from src.config import AppConfig
+
+COLLECTION_NAME = "adgm_reference"
+
+
+class VectorStore:
+    """Minimal interface the indexer and retriever need from a vector backend.
+
+    ``query`` mirrors Chroma's result shape: one list of ids/documents/
+    metadatas/distances per query embedding.
+    """
+
+    name = "base"
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]], embeddings: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]) -> None:
+        raise NotImplementedError
+
+    def query(self, query_embeddings: Sequence[np.ndarray], n_results: int) -> Dict[str, List[List[Any]]]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Persist pending writes; backends that write through can ignore this."""
+
+
+class ChromaVectorStore(VectorStore):
+    name = "chroma"
+
+    def __init__(self, path: str, collection_name: str = COLLECTION_NAME, client=None):
+        import chromadb
+        self.client = client if client is not None else chromadb.PersistentClient(path=path)
+        self.collection_name = collection_name
+
+    def _get_collection(self):
+        # Looked up per call: long-lived holders must see a collection recreated by reset()
+        return self.client.get_or_create_collection(
+            name=self.collection_name,
+            metadata={"hnsw:space": "cosine"},
+        )
+
+    def count(self) -> int:
+        return self._get_collection().count()
+
+    def upsert(self, ids, documents, metadatas, embeddings) -> None:
+        self._get_collection().upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def delete(self, ids) -> None:
+        self._get_collection().delete(ids=ids)
+
+    def query(self, query_embeddings, n_results):
+        res = self._get_collection().query(query_embeddings=list(query_embeddings), n_results=n_results)
+        return {
+            "ids": res.get("ids") or [],
+            "documents": res.get("documents") or [],
+            "metadatas": res.get("metadatas") or [],
+            "distances": res.get("distances") or [],
+        }
+
+    def reset(self) -> None:
+        try:
+            self.client.delete_collection(self.collection_name)
+        except Exception:
+            pass
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NumpyVectorStore(VectorStore):
+    """Exact cosine search over a memory-mapped float32 ``.npy`` matrix.
+
+    Rows are L2-normalised on write, so a query is one matmul plus
+    ``argpartition``. Documents, metadata and ids live in a JSON sidecar.
+    Readers memory-map the matrix (the page cache is shared between worker
+    processes) and reload when another process flushes a new version.
+    Writes are buffered in memory until ``flush``.
+    """
+
+    name = "numpy"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.emb_path = os.path.join(path, "embeddings.npy")
+        self.meta_path = os.path.join(path, "meta.json")
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._loaded_mtime: int | None = None
+        self._load()
+
+    def _load(self) -> None:
+        self._emb: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._docs: List[str] = []
+        self._metas: List[Dict[str, Any]] = []
+        self._loaded_mtime = None
+        if os.path.exists(self.meta_path) and os.path.exists(self.emb_path):
+            mtime = os.stat(self.meta_path).st_mtime_ns
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            emb = np.load(self.emb_path, mmap_mode="r")
+            if emb.shape[0] == len(meta["ids"]):
+                self._emb = emb
+                self._ids = meta["ids"]
+                self._docs = meta["documents"]
+                self._metas = meta["metadatas"]
+                self._loaded_mtime = mtime
+        self._row = {cid: i for i, cid in enumerate(self._ids)}
+
+    def _maybe_reload(self) -> None:
+        if self._dirty or not os.path.exists(self.meta_path):
+            return
+        if os.stat(self.meta_path).st_mtime_ns != self._loaded_mtime:
+            self._load()
+
+    def count(self) -> int:
+        with self._lock:
+            self._maybe_reload()
+            return len(self._ids)
+
+    def upsert(self, ids, documents, metadatas, embeddings) -> None:
+        vectors = _normalize_rows(np.asarray(embeddings))
+        with self._lock:
+            self._maybe_reload()
+            if self._emb.shape[0] == 0:
+                self._emb = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            elif not self._dirty:
+                self._emb = np.array(self._emb)  # detach from the read-only mmap before editing
+            new_rows: List[int] = []
+            for i, cid in enumerate(ids):
+                row = self._row.get(cid)
+                if row is None:
+                    self._row[cid] = len(self._ids)
+                    self._ids.append(cid)
+                    self._docs.append(documents[i])
+                    self._metas.append(metadatas[i])
+                    new_rows.append(i)
+                else:
+                    self._emb[row] = vectors[i]
+                    self._docs[row] = documents[i]
+                    self._metas[row] = metadatas[i]
+            if new_rows:
+                self._emb = np.concatenate([self._emb, vectors[new_rows]])
+            self._dirty = True
+
+    def delete(self, ids) -> None:
+        with self._lock:
+            self._maybe_reload()
+            drop = {self._row[cid] for cid in ids if cid in self._row}
+            if not drop:
+                return
+            keep = [i for i in range(len(self._ids)) if i not in drop]
+            self._emb = np.array(self._emb[keep]) if keep else np.zeros((0, self._emb.shape[1]), dtype=np.float32)
+            self._ids = [self._ids[i] for i in keep]
+            self._docs = [self._docs[i] for i in keep]
+            self._metas = [self._metas[i] for i in keep]
+            self._row = {cid: i for i, cid in enumerate(self._ids)}
+            self._dirty = True
+
+    def query(self, query_embeddings, n_results):
+        with self._lock:
+            self._maybe_reload()
+            emb, ids, docs, metas = self._emb, self._ids, self._docs, self._metas
+        n_queries = len(query_embeddings)
+        k = min(n_results, emb.shape[0])
+        if k <= 0:
+            return {key: [[] for _ in range(n_queries)] for key in ("ids", "documents", "metadatas", "distances")}
+        scores = _normalize_rows(np.asarray(query_embeddings)) @ emb.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        out: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for qi in range(scores.shape[0]):
+            order = top[qi][np.argsort(-scores[qi, top[qi]])]
+            out["ids"].append([ids[i] for i in order])
+            out["documents"].append([docs[i] for i in order])
+            out["metadatas"].append([metas[i] for i in order])
+            out["distances"].append([float(1.0 - scores[qi, i]) for i in order])
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            for p in (self.meta_path, self.emb_path):
+                if os.path.exists(p):
+                    os.remove(p)
+            self._load()
+            self._dirty = False
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            # Matrix first, sidecar last: readers only switch once the sidecar changes
+            tmp_emb = self.emb_path + ".tmp.npy"
+            np.save(tmp_emb, np.ascontiguousarray(self._emb, dtype=np.float32))
+            os.replace(tmp_emb, self.emb_path)
+            tmp_meta = self.meta_path + ".tmp"
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump({"ids": self._ids, "documents": self._docs, "metadatas": self._metas}, f, ensure_ascii=False)
+            os.replace(tmp_meta, self.meta_path)
+            self._dirty = False
+            self._load()
+
+
+def create_vector_store(config: AppConfig) -> VectorStore:
+    backend = (config.vector_backend or "chroma").lower()
+    if backend == "chroma":
+        return ChromaVectorStore(config.vectorstore_dir)
+    if backend == "numpy":
+        return NumpyVectorStore(os.path.join(config.vectorstore_dir, "numpy"))
+    raise ValueError(f"Unsupported VECTOR_BACKEND: {config.vector_backend!r} (expected 'chroma' or 'numpy')")
@@ -0,0 +1,44 @@
+from __future__ import annotations
+import hashlib
+import json
+from typing import Any, Dict
+
+from src.utils.cache_utils import SQLiteLRUCache
+
+# Bump when the pipeline's output for the same inputs changes (prompts, annotation, entry layout)
+REVIEW_CACHE_VERSION = 2
+
+
+def make_review_key(content_hash: str, file_name: str, rules_version: str, index_key: str, llm_fingerprint: str, retrieval_mode: str) -> str:
+    # The file name is part of the key because classification also looks at it
+    payload = json.dumps(
+        [REVIEW_CACHE_VERSION, content_hash, file_name, rules_version, index_key, llm_fingerprint, retrieval_mode],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReviewCache(SQLiteLRUCache):
+    """Persistent, size-bounded cache of whole-document reviews (SQLite, LRU eviction).
+
+    Each entry holds the document type, the report entry (merged issues) and
+    the reviewed .docx bytes, stored as one value: the JSON header, a NUL
+    byte, then the .docx.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        super().__init__(path, max_bytes, table="reviews")
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        """``{"doc_type", "entry", "reviewed"}`` for a cached review, else None."""
+        value = super().get(key)
+        if value is None:
+            return None
+        # JSON escapes control characters, so the first NUL ends the header
+        header, _, reviewed = bytes(value).partition(b"\0")
+        meta = json.loads(header)
+        return {"doc_type": meta["doc_type"], "entry": meta["entry"], "reviewed": reviewed}
+
+    def put(self, key: str, doc_type: str, entry: Dict[str, Any], reviewed: bytes) -> None:
+        header = json.dumps({"doc_type": doc_type, "entry": entry}, ensure_ascii=False).encode("utf-8")
+        super().put(key, header + b"\0" + reviewed)
@@ -1,7 +1,11 @@
 from __future__ import annotations
+import hashlib
 import re
 from typing import List, Dict, Any
 
+from src.docx_tools.parser import DocumentModel
+from src.rules.engine import Rule, RuleEngine, snippet_around
+
 # Canonical required docs for Company Incorporation (simplified POC list)
 REQUIRED_INCORP_DOCS: List[str] = [
     "Articles of Association",
@@ -15,76 +19,109 @@ REQUIRED_INCORP_DOCS: List[str] = [
 ]
 
 
+# Declarative red-flag registry: add checks here, they are all evaluated in one pass
+RULES: List[Rule] = [
+    Rule(
+        id="jurisdiction_missing",
+        issue="Jurisdiction reference missing or not specific to ADGM",
+        suggestion="Specify jurisdiction as ADGM Courts per ADGM Companies Regulations.",
+        keywords=("adgm", "abu dhabi global market"),
+        when="absent",
+    ),
+    Rule(
+        id="signature_missing",
+        issue="Signature section may be missing",
+        suggestion="Add a signatory section with name, title, and date.",
+        keywords=("signature", "signed by", "authorised signatory", "authorized signatory"),
+        when="absent",
+    ),
+    Rule(
+        id="template_placeholder",
+        issue="Template placeholders detected",
+        suggestion="Replace placeholders with finalized values.",
+        patterns=(r"\b(?:tbd|tba)\b", r"\[\s*insert[^\]]*\]", r"<\s*insert[^>]*>"),
+    ),
+    Rule(
+        id="objects_clause_missing",
+        issue="Objects/purpose clause not found",
+        suggestion="Include company objects/purpose consistent with ADGM templates.",
+        keywords=("objects", "purpose"),
+        when="absent",
+        doc_types=("Articles of Association",),
+    ),
+]
+
+DOC_TYPE_KEYWORDS: Dict[str, str] = {
+    "articles of association": "Articles of Association",
+    "memorandum of association": "Memorandum of Association",
+    "board resolution": "Board Resolution",
+    "shareholder resolution": "Shareholder Resolution",
+    "incorporation application": "Incorporation Application Form",
+    "ubo": "UBO Declaration Form",
+    "register of members": "Register of Members and Directors",
+    "change of registered address": "Change of Registered Address Notice",
+}
+_DOC_TYPE_RE = re.compile("|".join(re.escape(k) for k in DOC_TYPE_KEYWORDS))
+
+_engine: RuleEngine | None = None
+
+
+def get_rule_engine() -> RuleEngine:
+    global _engine
+    if _engine is None:
+        _engine = RuleEngine(RULES)
+    return _engine
+
+
+def rule_stats() -> Dict[str, Any]:
+    return get_rule_engine().stats()
+
+
+def rules_version() -> str:
+    """Fingerprint of the rule set and classifier keywords; changes whenever either is edited."""
+    payload = repr((RULES, sorted(DOC_TYPE_KEYWORDS.items())))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
 def normalize(text: str) -> str:
     return re.sub(r"\s+", " ", text or "").strip().lower()
 
 
-def classify_document_type(text: str, filename: str | None = None) -> str:
-    content = normalize(text)
+def classify_document_type(text: str | DocumentModel, filename: str | None = None) -> str:
+    content = text.normalized if isinstance(text, DocumentModel) else normalize(text)
     name = normalize(filename or "")
 
-    mapping = {
-        "articles of association": "Articles of Association",
-        "memorandum of association": "Memorandum of Association",
-        "board resolution": "Board Resolution",
-        "shareholder resolution": "Shareholder Resolution",
-        "incorporation application": "Incorporation Application Form",
-        "ubo": "UBO Declaration Form",
-        "register of members": "Register of Members and Directors",
-        "change of registered address": "Change of Registered Address Notice",
-    }
-
-    for key, label in mapping.items():
-        if key in content or key in name:
+    # One scan of each string; the earliest keyword in DOC_TYPE_KEYWORDS order wins
+    found = set(_DOC_TYPE_RE.findall(content)) | set(_DOC_TYPE_RE.findall(name))
+    for key, label in DOC_TYPE_KEYWORDS.items():
+        if key in found:
             return label
 
     return "Unknown"
 
 
-def detect_red_flags_rule_based(text: str, doc_type: str) -> List[Dict[str, Any]]:
+def detect_red_flags_rule_based(text: str | DocumentModel, doc_type: str) -> List[Dict[str, Any]]:
     findings: List[Dict[str, Any]] = []
-    lower = text.lower()
-
-    # Jurisdiction check: must reference ADGM
-    if "adgm" not in lower and "abu dhabi global market" not in lower:
-        findings.append({
-            "section": None,
-            "issue": "Jurisdiction reference missing or not specific to ADGM",
-            "severity": "Medium",
-            "suggestion": "Specify jurisdiction as ADGM Courts per ADGM Companies Regulations.",
-            "snippet": text[:200],
-        })
-
-    # Signature block presence (simple heuristic)
-    if not re.search(r"signature|signed by|authorised signatory|authorized signatory", lower):
-        findings.append({
-            "section": None,
-            "issue": "Signature section may be missing",
-            "severity": "Medium",
-            "suggestion": "Add a signatory section with name, title, and date.",
-            "snippet": text[:200],
-        })
-
-    # Placeholder detection
-    if re.search(r"\b(TBD|TBA|\[\s*insert[^\]]*\]|<\s*insert[^>]*>)\b", text, flags=re.IGNORECASE):
-        findings.append({
+    model = text if isinstance(text, DocumentModel) else None
+    if model is not None:
+        text, lower = model.text, model.lower
+    else:
+        lower = text.lower()
+
+    for rule, span in get_rule_engine().evaluate(lower, doc_type):
+        finding: Dict[str, Any] = {
             "section": None,
-            "issue": "Template placeholders detected",
-            "severity": "Medium",
-            "suggestion": "Replace placeholders with finalized values.",
-            "snippet": text[:200],
-        })
-
-    # Document-specific heuristic checks
-    if doc_type == "Articles of Association":
-        if "objects" not in lower and "purpose" not in lower:
-            findings.append({
-                "section": None,
-                "issue": "Objects/purpose clause not found",
-                "severity": "Medium",
-                "suggestion": "Include company objects/purpose consistent with ADGM templates.",
-                "snippet": text[:200],
-            })
+            "issue": rule.issue,
+            "severity": rule.severity,
+            "suggestion": rule.suggestion,
+            "snippet": None,
+            "rule_id": rule.id,
+        }
+        if span is not None:
+            finding["snippet"] = snippet_around(text, *span)
+            if model is not None:
+                finding["location"] = model.location(*span)
+        findings.append(finding)
 
     return findings
 
@@ -0,0 +1,157 @@
+from __future__ import annotations
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from src.utils.text_search import build_automaton
+
+SNIPPET_CHARS = 200
+
+Span = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A declarative red-flag check.
+
+    ``keywords`` are literal substrings and ``patterns`` regexes, both matched
+    against the lowercased text. A rule with ``when="present"`` fires on its
+    first match (and points at it); one with ``when="absent"`` fires when
+    nothing matches. ``doc_types`` restricts the rule to those document types
+    (empty means all).
+    """
+
+    id: str
+    issue: str
+    suggestion: str
+    keywords: Tuple[str, ...] = ()
+    patterns: Tuple[str, ...] = ()
+    when: str = "present"
+    severity: str = "Medium"
+    doc_types: Tuple[str, ...] = ()
+
+    def applies_to(self, doc_type: str) -> bool:
+        return not self.doc_types or doc_type in self.doc_types
+
+
+def snippet_around(text: str, start: int, end: int, limit: int = SNIPPET_CHARS) -> str:
+    """The line containing ``text[start:end]``, clipped to ``limit`` characters around it."""
+    line_start = text.rfind("\n", 0, start) + 1
+    line_end = text.find("\n", end)
+    if line_end < 0:
+        line_end = len(text)
+    if line_end - line_start > limit:
+        line_start = max(line_start, start - limit // 4)
+        line_end = min(line_end, line_start + limit)
+    return text[line_start:line_end].strip()
+
+
+class RuleEngine:
+    """Evaluates every rule with one keyword pass and one regex pass.
+
+    All rule keywords go into a single Aho-Corasick automaton (``pyahocorasick``
+    when installed; otherwise one C-level ``str.find`` scan per keyword, which
+    beats a Python-level alternation by a wide margin). All regex patterns are
+    merged into one alternation of named groups. Per-rule match and fire
+    counts and the scan time are accumulated on the engine.
+    """
+
+    def __init__(self, rules: List[Rule]):
+        ids = [r.id for r in rules]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate rule ids in registry")
+        self.rules = list(rules)
+        self._keywords: Dict[str, List[str]] = {}
+        for rule in self.rules:
+            for keyword in rule.keywords:
+                self._keywords.setdefault(keyword.lower(), []).append(rule.id)
+        self._automaton = None
+        if self._keywords:
+            self._automaton = build_automaton({k: (len(k), tuple(ids)) for k, ids in self._keywords.items()})
+        self._groups = {f"r{i}": rule.id for i, rule in enumerate(self.rules) if rule.patterns}
+        by_id = {rule.id: rule for rule in self.rules}
+        self._matcher = None
+        if self._groups:
+            self._matcher = re.compile("|".join(
+                f"(?P<{g}>{'|'.join(by_id[rule_id].patterns)})" for g, rule_id in self._groups.items()
+            ))
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {r.id: {"matches": 0, "fired": 0} for r in self.rules}
+        self._scans = 0
+        self._scan_seconds = 0.0
+
+    @property
+    def keyword_backend(self) -> str:
+        return "aho-corasick" if self._automaton is not None else "str.find"
+
+    def _scan_keywords(self, lower: str, found: Dict[str, List[Any]]) -> None:
+        def hit(rule_id: str, span: Span) -> None:
+            entry = found.get(rule_id)
+            if entry is None:
+                found[rule_id] = [span, 1]
+            else:
+                entry[0] = min(entry[0], span)
+                entry[1] += 1
+
+        if self._automaton is not None:
+            for end, (length, rule_ids) in self._automaton.iter(lower):
+                for rule_id in rule_ids:
+                    hit(rule_id, (end - length + 1, end + 1))
+            return
+        for keyword, rule_ids in self._keywords.items():
+            pos = lower.find(keyword)
+            while pos >= 0:
+                for rule_id in rule_ids:
+                    hit(rule_id, (pos, pos + len(keyword)))
+                pos = lower.find(keyword, pos + 1)
+
+    def scan(self, lower: str) -> Dict[str, Tuple[Span, int]]:
+        """Map rule id -> (first match span, match count) for every rule that matched."""
+        start = time.perf_counter()
+        found: Dict[str, List[Any]] = {}
+        if self._keywords:
+            self._scan_keywords(lower, found)
+        if self._matcher is not None:
+            for m in self._matcher.finditer(lower):
+                rule_id = self._groups[m.lastgroup]
+                entry = found.get(rule_id)
+                if entry is None:
+                    found[rule_id] = [m.span(), 1]
+                else:
+                    entry[0] = min(entry[0], m.span())
+                    entry[1] += 1
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._scans += 1
+            self._scan_seconds += elapsed
+            for rule_id, (_, count) in found.items():
+                self._stats[rule_id]["matches"] += count
+        return {rule_id: (span, count) for rule_id, (span, count) in found.items()}
+
+    def evaluate(self, lower: str, doc_type: str) -> List[Tuple[Rule, Span | None]]:
+        """Rules that fire for this document, with the span that triggered them (None for absence rules)."""
+        found = self.scan(lower)
+        fired: List[Tuple[Rule, Span | None]] = []
+        for rule in self.rules:
+            if not rule.applies_to(doc_type):
+                continue
+            hit = found.get(rule.id)
+            if rule.when == "present" and hit:
+                fired.append((rule, hit[0]))
+            elif rule.when == "absent" and not hit:
+                fired.append((rule, None))
+        with self._lock:
+            for rule, _ in fired:
+                self._stats[rule.id]["fired"] += 1
+        return fired
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "keyword_backend": self.keyword_backend,
+                "scans": self._scans,
+                "scan_seconds": round(self._scan_seconds, 6),
+                "rules": {rule_id: dict(s) for rule_id, s in self._stats.items()},
+            }
@@ -0,0 +1,220 @@
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from src.config import AppConfig
+from src.utils.file_utils import ensure_directories
+from src.utils.metrics import METRICS, span
+
+
+class ServiceRegistry:
+    """Process-wide container for the heavy services (embeddings, vector store, LLM).
+
+    Services are created lazily on first access and then reused, so the
+    SentenceTransformer and the vector store are loaded once per process and
+    shared by the indexer and the retriever.
+    """
+
+    def __init__(self, config: AppConfig | None = None):
+        self._config = config
+        self._lock = threading.RLock()
+        self._services: Dict[str, Any] = {}
+        self.load_times: Dict[str, float] = {}
+        # Set once warm_up (or the background warm-up) has finished for the current config
+        self.ready = threading.Event()
+        self.index_status: str | None = None
+        self.warm_error: str | None = None
+        self._generation = 0
+
+    @property
+    def config(self) -> AppConfig:
+        with self._lock:
+            if self._config is None:
+                self._config = AppConfig.from_env()
+            return self._config
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        service = self._services.get(name)
+        if service is not None:
+            return service
+        with self._lock:
+            service = self._services.get(name)
+            if service is None:
+                start = time.perf_counter()
+                with span(f"load_{name}"):
+                    service = factory()
+                self.load_times[name] = round(time.perf_counter() - start, 4)
+                METRICS.set("adgm_service_load_seconds", self.load_times[name], "Time taken to load each service.", service=name)
+                self._services[name] = service
+            return service
+
+    def _prepare_dirs(self) -> bool:
+        config = self.config
+        ensure_directories([
+            config.data_reference_dir,
+            config.outputs_dir,
+            config.vectorstore_dir,
+            config.cache_dir,
+        ])
+        return True
+
+    def embeddings(self):
+        def factory():
+            from src.rag.embeddings import EmbeddingsModel
+            return EmbeddingsModel(self.config)
+        return self._get("embeddings", factory)
+
+    def vector_store(self):
+        def factory():
+            from src.rag.vectorstore import create_vector_store
+            self._get("directories", self._prepare_dirs)
+            return create_vector_store(self.config)
+        return self._get("vector_store", factory)
+
+    def lexical_index(self):
+        def factory():
+            import os
+            from src.rag.lexical import BM25_NAME, BM25Index
+            self._get("directories", self._prepare_dirs)
+            return BM25Index(os.path.join(self.config.vectorstore_dir, BM25_NAME))
+        return self._get("lexical_index", factory)
+
+    def _uses_dense(self) -> bool:
+        # Lexical-only deployments never load the embedding model or the vector store
+        return self.config.retrieval_mode != "lexical"
+
+    def indexer(self):
+        def factory():
+            from src.rag.indexer import RAGIndexer
+            dense = self._uses_dense()
+            return RAGIndexer(
+                config=self.config,
+                store=self.vector_store() if dense else None,
+                emb_model=self.embeddings() if dense else None,
+                lexical=self.lexical_index(),
+            )
+        return self._get("indexer", factory)
+
+    def retriever(self):
+        def factory():
+            from src.rag.retriever import RAGRetriever
+            indexer = self.indexer()
+            dense = self._uses_dense()
+            retriever = RAGRetriever(
+                config=self.config,
+                store=self.vector_store() if dense else None,
+                emb_model=self.embeddings() if dense else None,
+                index_version=indexer.index_version,
+                lexical=self.lexical_index(),
+            )
+            indexer.add_change_listener(retriever.set_index_version)
+            return retriever
+        return self._get("retriever", factory)
+
+    def llm(self):
+        def factory():
+            from src.llm.client import LLMClient
+            return LLMClient(config=self.config)
+        return self._get("llm", factory)
+
+    def review_cache(self):
+        """Whole-document review cache; None when ``REVIEW_CACHE`` is off."""
+        if not self.config.review_cache_enabled:
+            return None
+
+        def factory():
+            import os
+            from src.review_cache import ReviewCache
+            self._get("directories", self._prepare_dirs)
+            return ReviewCache(os.path.join(self.config.cache_dir, "document_reviews.sqlite3"), self.config.review_cache_max_bytes)
+        return self._get("review_cache", factory)
+
+    def analysis_pool(self):
+        """Process pool for CPU-bound document work; None when ``WORKERS <= 1``."""
+        if self.config.workers <= 1:
+            return None
+
+        def factory():
+            from src.pipeline import create_analysis_pool
+            return create_analysis_pool(self.config.workers)
+        return self._get("analysis_pool", factory)
+
+    def _load_all(self) -> None:
+        self._get("directories", self._prepare_dirs)
+        self.indexer()
+        self.retriever()
+        self.llm()
+
+    def warm_up(self) -> Dict[str, float]:
+        """Eagerly create every service and return the per-service load times."""
+        self._load_all()
+        self.ready.set()
+        return dict(self.load_times)
+
+    def warm_up_async(self, sync_index: bool = True) -> threading.Thread:
+        """Run ``warm_up`` (and sync the reference index) on a daemon thread.
+
+        ``ready`` is set only once both have finished, also on failure (see
+        ``warm_error``). Requests arriving earlier block on the registry lock
+        until the service they need has loaded.
+        """
+        generation = self._generation
+
+        def run() -> None:
+            try:
+                self._load_all()
+                if sync_index:
+                    self.index_status = self.indexer().build_or_rebuild()
+            except Exception as e:
+                self.warm_error = f"{type(e).__name__}: {e}"
+            finally:
+                if generation == self._generation:
+                    self.ready.set()
+
+        thread = threading.Thread(target=run, name="warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def reload(self, config: AppConfig | None = None, warm: bool = False) -> None:
+        """Drop all services (and the config) so they are rebuilt on next access.
+
+        Callers already holding a service keep using it until they finish.
+        """
+        with self._lock:
+            pool = self._services.get("analysis_pool")
+            self._config = config
+            self._services = {}
+            self.load_times = {}
+            self._generation += 1
+            self.ready.clear()
+            self.index_status = None
+            self.warm_error = None
+        if pool is not None:
+            pool.shutdown(wait=False)
+        if warm:
+            self.warm_up()
+
+    def as_dict(self) -> Dict[str, Any]:
+        self._get("directories", self._prepare_dirs)
+        return {
+            "config": self.config,
+            "indexer": self.indexer(),
+            "retriever": self.retriever(),
+            "llm": self.llm(),
+            "analysis_pool": self.analysis_pool(),
+            "review_cache": self.review_cache(),
+        }
+
+
+_REGISTRY: ServiceRegistry | None = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_registry() -> ServiceRegistry:
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = ServiceRegistry()
+    return _REGISTRY
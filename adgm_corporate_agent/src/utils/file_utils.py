@@ -1,5 +1,7 @@
+import hashlib
 import json
 import os
+import threading
 import zipfile
 from typing import List
 
@@ -9,15 +11,65 @@ def ensure_directories(paths: List[str]) -> None:
         os.makedirs(p, exist_ok=True)
 
 
-def save_json_pretty(data, path: str) -> None:
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def save_json(data, path: str, indent: int | None = 2) -> None:
+    """Write JSON; ``indent`` of None/0 uses the compact encoding (no whitespace)."""
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        if indent:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        else:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+
+class StreamingZipWriter:
+    """Adds files to a ZIP as they are produced instead of zipping everything at the end.
+
+    The archive is created on the first ``add``; names already present
+    (e.g. when appending with ``mode="a"``) are skipped. Entry names are
+    relative to ``root`` when given, else the file's base name. Thread-safe;
+    once closed, ``add`` refuses further files rather than reopening (and
+    truncating) the archive.
+    """
+
+    def __init__(self, path: str, mode: str = "w", root: str | None = None):
+        self.path = path
+        self.mode = mode
+        self.root = root
+        self._zip: zipfile.ZipFile | None = None
+        self._names: set = set()
+        self._lock = threading.Lock()
+        self._closed = False
 
+    def add(self, arcname: str, data: bytes) -> bool:
+        with self._lock:
+            if self._closed:
+                return False
+            if self._zip is None:
+                self._zip = zipfile.ZipFile(self.path, self.mode, zipfile.ZIP_DEFLATED)
+                self._names = set(self._zip.namelist())
+            if arcname in self._names:
+                return False
+            self._zip.writestr(arcname, data)
+            self._names.add(arcname)
+            return True
 
-def zip_files(file_paths: List[str], zip_path: str) -> None:
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as z:
-        for fp in file_paths:
-            if os.path.exists(fp):
-                z.write(fp, arcname=os.path.basename(fp))
+    def arcname_for(self, file_path: str) -> str:
+        return os.path.relpath(file_path, self.root) if self.root else os.path.basename(file_path)
 
+    @property
+    def written(self) -> bool:
+        return bool(self._names)
 
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._zip is not None:
+                self._zip.close()
+                self._zip = None
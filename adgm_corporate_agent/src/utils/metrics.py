@@ -0,0 +1,218 @@
+from __future__ import annotations
+import contextvars
+import cProfile
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """Process-wide counters, gauges and histograms, exportable in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+
+    def _declare(self, name: str, kind: str, help_text: str) -> None:
+        if name not in self._help:
+            self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, amount: float = 1.0, help_text: str = "", **labels: Any) -> None:
+        with self._lock:
+            self._declare(name, "counter", help_text)
+            series = self._values.setdefault(name, {})
+            key = _labels(labels)
+            series[key] = series.get(key, 0.0) + amount
+
+    def set(self, name: str, value: float, help_text: str = "", **labels: Any) -> None:
+        with self._lock:
+            self._declare(name, "gauge", help_text)
+            self._values.setdefault(name, {})[_labels(labels)] = float(value)
+
+    def observe(self, name: str, value: float, help_text: str = "", **labels: Any) -> None:
+        with self._lock:
+            self._declare(name, "histogram", help_text)
+            series = self._histograms.setdefault(name, {})
+            # Per-bucket counts, then count and sum
+            state = series.setdefault(_labels(labels), [0.0] * (len(STAGE_BUCKETS) + 2))
+            for i, bound in enumerate(STAGE_BUCKETS):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "values": {n: dict(s) for n, s in self._values.items()},
+                "histograms": {n: {k: list(v) for k, v in s.items()} for n, s in self._histograms.items()},
+            }
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            lines: List[str] = []
+            for name in sorted(self._help):
+                kind, help_text = self._help[name]
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "histogram":
+                    for key, state in sorted(self._histograms.get(name, {}).items()):
+                        for bound, count in zip(STAGE_BUCKETS, state):
+                            lines.append(f"{name}_bucket{_format_labels(key, (('le', repr(bound)),))} {count:g}")
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {state[-2]:g}")
+                        lines.append(f"{name}_count{_format_labels(key)} {state[-2]:g}")
+                        lines.append(f"{name}_sum{_format_labels(key)} {state[-1]:.6f}")
+                else:
+                    for key, value in sorted(self._values.get(name, {}).items()):
+                        lines.append(f"{name}{_format_labels(key)} {value:g}")
+            return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the text exposition atomically (e.g. for node_exporter's textfile collector)."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._help.clear()
+            self._values.clear()
+            self._histograms.clear()
+
+
+METRICS = MetricsRegistry()
+
+
+class Span:
+    """A timed section of work; spans nest into a per-request tree."""
+
+    def __init__(self, name: str, **attrs: Any):
+        self.name = name
+        self.attrs = {k: v for k, v in attrs.items() if v is not None}
+        self.start = time.perf_counter()
+        self.end: float | None = None
+        self.children: List[Span] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"name": self.name, "ms": round(self.duration * 1000, 2)}
+        if self.attrs:
+            out.update(self.attrs)
+        if self.children:
+            out["children"] = [c.to_dict() for c in list(self.children)]
+        return out
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, parent: Span | None = None, **attrs: Any) -> Iterator[Span]:
+    """Time a block as a child of ``parent`` (default: the current span) and record it in ``adgm_stage_seconds``.
+
+    Thread pools do not inherit context; submit through ``bind_context`` to
+    keep worker spans in the caller's tree.
+    """
+    s = Span(name, **attrs)
+    parent = parent if parent is not None else _current_span.get()
+    if parent is not None:
+        parent.children.append(s)
+    token = _current_span.set(s)
+    try:
+        yield s
+    finally:
+        s.end = time.perf_counter()
+        _current_span.reset(token)
+        METRICS.observe("adgm_stage_seconds", s.duration, "Time spent per pipeline stage.", stage=name)
+
+
+def bind_context(fn: Callable[..., Any], parent: Span | None = None) -> Callable[..., Any]:
+    """Wrap ``fn`` so spans opened in a pool thread nest under ``parent`` (default: the caller's current span)."""
+    parent = parent if parent is not None else _current_span.get()
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        token = _current_span.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+    return run
+
+
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def maybe_profile(label: str, threshold: float, mode: str, out_dir: str) -> Iterator[None]:
+    """Capture cProfile and/or tracemalloc data for the block; keep it only if it took ``threshold``+ seconds.
+
+    Disabled when ``threshold <= 0``. Only one capture runs at a time
+    (profilers are per-process); concurrent blocks run unprofiled.
+    """
+    if threshold <= 0 or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    profiler = cProfile.Profile() if mode in ("cprofile", "both") else None
+    tracing = mode in ("tracemalloc", "both") and not tracemalloc.is_tracing()
+    start = time.perf_counter()
+    try:
+        if tracing:
+            tracemalloc.start()
+        if profiler is not None:
+            profiler.enable()
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+        try:
+            if elapsed >= threshold:
+                os.makedirs(out_dir, exist_ok=True)
+                stem = os.path.join(out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{_safe(label)}_{elapsed:.1f}s")
+                if profiler is not None:
+                    profiler.dump_stats(stem + ".prof")
+                if tracing:
+                    top = tracemalloc.take_snapshot().statistics("lineno")[:50]
+                    _, peak = tracemalloc.get_traced_memory()
+                    with open(stem + ".tracemalloc.txt", "w", encoding="utf-8") as f:
+                        f.write(f"peak {peak / 1024 / 1024:.1f} MiB\n")
+                        f.write("\n".join(str(stat) for stat in top) + "\n")
+                METRICS.inc("adgm_profiles_captured_total", help_text="Profiles dumped for slow requests.")
+        finally:
+            if tracing:
+                tracemalloc.stop()
+            _profile_lock.release()
+
+
+def _safe(label: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in label)[:60]
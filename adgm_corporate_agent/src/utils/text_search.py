@@ -0,0 +1,44 @@
+from __future__ import annotations
+import re
+from typing import Any, Dict, Iterable
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_for_search(text: str) -> str:
+    return WHITESPACE_RE.sub(" ", (text or "").lower())
+
+
+def build_automaton(words: Dict[str, Any]):
+    """Aho-Corasick automaton mapping each word to its payload, or None without ``pyahocorasick``."""
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word, payload in words.items():
+        automaton.add_word(word, payload)
+    automaton.make_automaton()
+    return automaton
+
+
+def first_occurrences(haystack: str, needles: Iterable[str]) -> Dict[str, int]:
+    """Start offset of the first occurrence of every needle found in ``haystack``.
+
+    One Aho-Corasick pass when available, otherwise one ``str.find`` per needle.
+    """
+    wanted = {n for n in needles if n}
+    found: Dict[str, int] = {}
+    automaton = build_automaton({n: (len(n), n) for n in wanted}) if wanted else None
+    if automaton is not None:
+        for end, (length, needle) in automaton.iter(haystack):
+            if needle not in found:
+                found[needle] = end - length + 1
+                if len(found) == len(wanted):
+                    break
+        return found
+    for needle in wanted:
+        pos = haystack.find(needle)
+        if pos >= 0:
+            found[needle] = pos
+    return found